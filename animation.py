@@ -0,0 +1,100 @@
+import threading
+
+import numpy as np
+
+import goldak
+
+
+def voxel_spacing(goldak_parameters: np.ndarray, per_radius: int = 4) -> float:
+    """Grid spacing resolving the smallest ellipsoid radius with `per_radius` voxels."""
+    return min(goldak_parameters[1:5]) / per_radius
+
+
+def source_frame(position: np.ndarray, direction: np.ndarray, goldak_parameters: np.ndarray, spacing: float) -> tuple:
+    """Points inside the heat-source ellipsoid of one step and their flux."""
+    chunks = list(goldak.ellipsoid_voxels(position, direction, goldak_parameters, spacing=spacing))
+    if not chunks:
+        return np.empty((0, 3)), np.empty(0)
+    return np.concatenate([chunk[0] for chunk in chunks]), np.concatenate([chunk[1] for chunk in chunks])
+
+
+class FrameCache:
+    """
+    Heat-source point clouds of every welding step in a bounded cache that a worker thread
+    keeps filled ahead of the playhead (see fill), while the GUI plays it back with peek.
+    """
+
+    def __init__(self,
+                 positions: np.ndarray,
+                 directions: np.ndarray,
+                 goldak_parameters: np.ndarray,
+                 spacing: float,
+                 maxsize: int = 512):
+        self.positions = positions
+        self.directions = directions
+        self.goldak_parameters = goldak_parameters
+        self.spacing = spacing
+        self.maxsize = maxsize
+        self.frames = {}
+        self.playhead = 0
+        self.stopped = False
+        self.condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def ahead(self) -> list:
+        """Steps from the playhead on, wrapping around, as many as the cache holds."""
+        return [(self.playhead + i) % len(self) for i in range(min(len(self), self.maxsize))]
+
+    def store(self, step: int, frame: tuple):
+        """Add a frame, dropping those furthest ahead of the playhead (just behind it) when full."""
+        with self.condition:
+            self.frames[step] = frame
+            while len(self.frames) > self.maxsize:
+                del self.frames[max(self.frames, key=lambda s: (s - self.playhead) % len(self))]
+
+    def peek(self, step: int):
+        """(points, flux) of `step` if it is already computed, else None."""
+        with self.condition:
+            return self.frames.get(step)
+
+    def get(self, step: int) -> tuple:
+        """(points, flux) of `step`, computed in the calling thread if needed."""
+        frame = self.peek(step)
+        if frame is None:
+            frame = source_frame(self.positions[step], self.directions[step], self.goldak_parameters, self.spacing)
+            self.store(step, frame)
+        return frame
+
+    def seek(self, step: int):
+        """Move the playhead, so that fill computes the frames from `step` on next."""
+        with self.condition:
+            self.playhead = step
+            self.condition.notify_all()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def fill(self, progress=None):
+        """
+        Compute the missing frames ahead of the playhead, nearest first, and wait for the
+        playhead to move once they are all there, until stop is called.
+        `progress(step, total)` is called after computing `step`; returning False stops as well.
+        """
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    step = next((s for s in self.ahead() if s not in self.frames), None)
+                    if step is not None:
+                        break
+                    self.condition.wait()
+                if self.stopped:
+                    return
+
+            self.store(step, source_frame(self.positions[step], self.directions[step], self.goldak_parameters,
+                                          self.spacing))
+            if progress is not None and progress(step, len(self)) is False:
+                return
@@ -0,0 +1,229 @@
+"""
+Headless generation of APDL scripts from job files, without Qt or VTK.
+
+A job is a JSON or TOML file such as:
+
+    output = "weld_a.txt"
+    points_csv = "weld_a.csv"          # or points = [[x, y, z], ...]
+    welding_duration = 200
+    cooling_duration = 7200
+    mode = "vector"                    # optional, see command_writer.LOAD_MODES
+    cull_radii = 3.0                   # optional
+    max_travel_fraction = 0.5          # optional
+    cooling_growth = 1.5               # optional, or cooling_times = [1, 5, 30, ...]
+    cooling_max_step = 600             # optional
+    compact = false                    # optional
+    centroids = "elements.csv"         # needed by mode = "precomputed"
+    trajectory_output = "weld_a.h5"    # optional binary trajectory, see binary_export.export_trajectory
+    trajectory_flux = true             # optional, adds the flux at the centroids to it
+
+    [goldak]                           # or a list of the nine values in table order
+    qval = 600000.0
+    c = 5.0
+    b = 5.0
+    af = 5.0
+    ar = 10.0
+    ff = 0.67
+    fr = 1.33
+    convection = 2.0e8
+    temperature = 22.0
+
+A job with a [sweep] table writes one script per combination of the swept Goldak
+parameters into the `output` directory, together with a manifest.csv:
+
+    [sweep]
+    qval = "400000:800000:5"           # start:stop:num
+    af = [4.0, 5.0, 6.0]
+
+A job with a list of [[passes]] instead of points, goldak and welding_duration writes one script
+in which all passes (or torches) weld at their own times, see command_writer.write_multi_pass_commands
+(mode "element" or "precomputed" only, without cull_radii, max_travel_fraction and compact;
+all passes must share the convection and temperature):
+
+    [[passes]]
+    points_csv = "root.csv"
+    goldak = [600000.0, 5.0, 5.0, 5.0, 10.0, 0.67, 1.33, 2.0e8, 22.0]
+    start_time = 0
+    end_time = 120
+
+    [[passes]]
+    points_csv = "cap.csv"
+    goldak = [800000.0, 6.0, 6.0, 6.0, 12.0, 0.67, 1.33, 2.0e8, 22.0]
+    start_time = 60
+    end_time = 200
+
+Relative paths are resolved against the directory of the job file.
+
+Usage: python batch.py JOB_OR_DIRECTORY [...] [-j WORKERS]
+"""
+import argparse
+import json
+import os
+import sys
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import binary_export as be
+import command_writer as cw
+import schedule as sc
+import sweep
+
+JOB_EXTENSIONS = (".json", ".toml")
+
+
+def read_points_csv(filepath: str) -> np.ndarray:
+    """Read the X,Y,Z control points written by Files>Export CSV (a header line is optional)."""
+    data = np.genfromtxt(filepath, delimiter=",", ndmin=2)
+    data = data[~np.isnan(data).any(axis=1)]
+    if data.shape[0] < 2 or data.shape[1] != 3:
+        raise ValueError(f"{filepath} must contain at least two X,Y,Z rows")
+    return data
+
+
+def load_job(filepath: str) -> dict:
+    """Read a JSON or TOML job file and resolve its relative paths."""
+    if filepath.endswith(".toml"):
+        with open(filepath, "rb") as file:
+            job = tomllib.load(file)
+    else:
+        with open(filepath, "r") as file:
+            job = json.load(file)
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    for key in ("output", "points_csv", "centroids", "trajectory_output"):
+        if key in job:
+            job[key] = os.path.join(directory, job[key])
+    for weld_pass in job.get("passes", []):
+        if "points_csv" in weld_pass:
+            weld_pass["points_csv"] = os.path.join(directory, weld_pass["points_csv"])
+    stem = os.path.splitext(os.path.abspath(filepath))[0]
+    job.setdefault("output", stem if "sweep" in job else stem + ".txt")
+    return job
+
+
+def goldak_vector(goldak) -> np.ndarray:
+    """Goldak parameters of a job, given as a list in table order or by name."""
+    if isinstance(goldak, dict):
+        missing = [name for name in cw.GOLDAK_PARAMETER_NAMES if name not in goldak]
+        if missing:
+            raise ValueError(f"Missing Goldak parameters: {', '.join(missing)}")
+        goldak = [goldak[name] for name in cw.GOLDAK_PARAMETER_NAMES]
+    values = np.asarray(goldak, dtype=float)
+    if values.shape != (len(cw.GOLDAK_PARAMETER_NAMES),):
+        raise ValueError(f"Expected {len(cw.GOLDAK_PARAMETER_NAMES)} Goldak parameters")
+    return values
+
+
+def writer_options(job: dict) -> dict:
+    """Keyword arguments of write_apdl_commands described by a job."""
+    options = {key: job[key]
+               for key in ("mode", "flux_cutoff", "cull_radii", "max_travel_fraction", "compact")
+               if key in job}
+
+    if "cooling_times" in job:
+        options["cooling_times"] = np.asarray(job["cooling_times"], dtype=float)
+    elif job.get("cooling_growth", 1.0) > 1.0:
+        options["cooling_times"] = sc.cooling_step_times(job["cooling_duration"],
+                                                         growth=job["cooling_growth"],
+                                                         max_step=job.get("cooling_max_step"))
+
+    if "centroids" in job:
+        options["element_centroids"] = cw.read_element_centroids(job["centroids"])
+    return options
+
+
+def job_points(job: dict) -> np.ndarray:
+    if "points_csv" in job:
+        return read_points_csv(job["points_csv"])
+    return np.asarray(job["points"], dtype=float)
+
+
+def run_job(filepath: str) -> str:
+    """Write the APDL script of one job file and return its output path (the manifest for sweeps)."""
+    job = load_job(filepath)
+    if "passes" in job:
+        unsupported = [key for key in ("cull_radii", "max_travel_fraction", "compact") if job.get(key)]
+        if unsupported:
+            raise ValueError(f"Options not available for several passes: {', '.join(unsupported)}")
+        options = writer_options(job)
+        cw.write_multi_pass_commands(job["output"],
+                                     [cw.WeldPass(job_points(weld_pass),
+                                                  goldak_vector(weld_pass["goldak"]),
+                                                  weld_pass["start_time"],
+                                                  weld_pass["end_time"])
+                                      for weld_pass in job["passes"]],
+                                     int(job.get("cooling_duration", 0)),
+                                     **{key: options[key] for key in ("mode", "flux_cutoff", "element_centroids", "cooling_times")
+                                        if key in options})
+        return job["output"]
+    if "sweep" in job:
+        return sweep.run_sweep(job["output"],
+                               job_points(job),
+                               goldak_vector(job["goldak"]),
+                               job["sweep"],
+                               int(job["welding_duration"]),
+                               int(job.get("cooling_duration", 0)),
+                               prefix=os.path.splitext(os.path.basename(filepath))[0],
+                               # jobs already run in parallel processes
+                               workers=1,
+                               **writer_options(job))
+    options = writer_options(job)
+    cw.write_apdl_commands(job["output"],
+                           job_points(job),
+                           goldak_vector(job["goldak"]),
+                           int(job["welding_duration"]),
+                           int(job.get("cooling_duration", 0)),
+                           **options)
+    if "trajectory_output" in job:
+        be.export_trajectory(job["trajectory_output"],
+                             job_points(job),
+                             goldak_vector(job["goldak"]),
+                             int(job["welding_duration"]),
+                             max_travel_fraction=options.get("max_travel_fraction"),
+                             element_centroids=options.get("element_centroids") if job.get("trajectory_flux") else None,
+                             flux_cutoff=options.get("flux_cutoff", 1e-6))
+    return job["output"]
+
+
+def collect_jobs(paths: list) -> list:
+    """Job files given directly or found in the given directories."""
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            jobs.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                               if name.endswith(JOB_EXTENSIONS)))
+        else:
+            jobs.append(path)
+    return jobs
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate APDL scripts from job files.")
+    parser.add_argument("jobs", nargs="+", help="job files (.json/.toml) or directories of them")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of parallel processes (default: number of CPUs)")
+    args = parser.parse_args(argv)
+
+    jobs = collect_jobs(args.jobs)
+    if not jobs:
+        print("No job files found.")
+        return 1
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                print(f"{futures[future]} -> {future.result()}")
+            except Exception as e:
+                failed += 1
+                print(f"{futures[future]} failed: {e}")
+
+    print(f"{len(jobs) - failed} of {len(jobs)} jobs written.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
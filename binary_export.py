@@ -0,0 +1,185 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from command_writer import ExportCancelled, PROGRESS_INTERVAL, atomic_path, welding_steps
+from goldak import goldak_flux, peak_flux
+from trajectory import default_cache
+
+# Output formats of export_trajectory:
+#   npy:  a directory of .npy files, one per array, which np.load(..., mmap_mode="r") maps
+#   hdf5: one .h5 file of chunked, gzip compressed datasets (needs h5py)
+EXPORT_FORMATS = ("npy", "hdf5")
+HDF5_EXTENSIONS = (".h5", ".hdf5")
+
+# Flux datasets of the HDF5 file are chunked into pieces of at most this many values of one step
+HDF5_CHUNK_VALUES = 256 * 1024
+
+
+@contextmanager
+def atomic_directory(directory: str):
+    """
+    Path of a new temporary directory next to `directory` that replaces it as a whole only if
+    the block succeeds. An existing `directory` may only hold the .npy files of an earlier export.
+    """
+    directory = os.path.abspath(directory)
+    if os.path.exists(directory) and (not os.path.isdir(directory) or
+                                      any(not name.endswith(".npy") for name in os.listdir(directory))):
+        raise ValueError(f"{directory} exists and is not a directory of exported arrays")
+
+    temp_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(directory)}.", dir=os.path.dirname(directory))
+    try:
+        yield temp_dir
+        if os.path.exists(directory):
+            old_dir = temp_dir + ".old"
+            os.rename(directory, old_dir)
+            try:
+                os.rename(temp_dir, directory)
+            except BaseException:
+                os.rename(old_dir, directory)
+                raise
+            shutil.rmtree(old_dir)
+        else:
+            os.rename(temp_dir, directory)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+
+def trajectory_arrays(points: np.ndarray,
+                      goldak_parameters: np.ndarray,
+                      welding_duration: int,
+                      max_travel_fraction: float = None) -> dict:
+    """
+    Sampled source trajectory of the welding phase as columns: the load step end `times`, the
+    source `positions` and unit travel `directions` applied during each step, and the constant
+    travel `speed` repeated for every step. The steps are those of write_apdl_commands.
+    """
+    step_times, positions, directions = welding_steps(points, goldak_parameters, welding_duration, max_travel_fraction)
+    times = np.asarray(step_times, dtype=float)
+    speed = default_cache.get(points).length / welding_duration
+    return dict(times=times,
+                positions=np.asarray(positions, dtype=float),
+                directions=np.asarray(directions, dtype=float),
+                speed=np.full(len(times), speed))
+
+
+def flux_rows(centroids: np.ndarray,
+              positions: np.ndarray,
+              directions: np.ndarray,
+              goldak_parameters: np.ndarray,
+              flux_cutoff: float = 1e-6):
+    """
+    Flux at the element `centroids` for every step as float32 rows, with values below
+    `flux_cutoff` times the peak flux set to zero like the elements the scripts leave unloaded.
+    """
+    threshold = flux_cutoff * peak_flux(goldak_parameters)
+    for position, direction in zip(positions, directions):
+        flux = goldak_flux(centroids, position, direction, goldak_parameters).astype(np.float32)
+        flux[flux < threshold] = 0.0
+        yield flux
+
+
+def report(progress, done: int, total: int):
+    if progress is not None and progress(done, total) is False:
+        raise ExportCancelled()
+
+
+def write_npy(directory: str, arrays: dict, flux=None, n_elements: int = 0, progress=None):
+    """
+    Save every entry of `arrays` as "<directory>/<name>.npy". The `flux` rows, if given, are
+    streamed into an (n_steps, n_elements) float32 "flux.npy" behind its header.
+    The directory is replaced as a whole, so its arrays always belong to the same export.
+    """
+    n_steps = len(arrays["times"])
+    with atomic_directory(directory) as temp_dir:
+        for name, values in arrays.items():
+            np.save(os.path.join(temp_dir, f"{name}.npy"), values)
+
+        if flux is not None:
+            with open(os.path.join(temp_dir, "flux.npy"), "wb") as file:
+                np.lib.format.write_array_header_1_0(file, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                                                            "fortran_order": False,
+                                                            "shape": (n_steps, n_elements)})
+                for t, row in enumerate(flux):
+                    file.write(np.ascontiguousarray(row, dtype=np.float32).tobytes())
+                    if (t + 1) % PROGRESS_INTERVAL == 0:
+                        report(progress, t + 1, n_steps)
+    report(progress, n_steps, n_steps)
+
+
+def write_hdf5(filepath: str, arrays: dict, flux=None, n_elements: int = 0, attributes: dict = None, progress=None):
+    """
+    Save every entry of `arrays` as a chunked, gzip compressed dataset of one HDF5 file, with the
+    `flux` rows, if given, as an (n_steps, n_elements) float32 "flux" dataset written step by step.
+    """
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("The HDF5 export needs the h5py package; export .npy arrays instead") from None
+
+    n_steps = len(arrays["times"])
+    with atomic_path(filepath, os.path.splitext(filepath)[1]) as temp_path:
+        with h5py.File(temp_path, "w") as file:
+            for name, values in (attributes or {}).items():
+                file.attrs[name] = values
+            for name, values in arrays.items():
+                file.create_dataset(name, data=values, chunks=True, compression="gzip", shuffle=True)
+
+            if flux is not None:
+                table = file.create_dataset("flux",
+                                            shape=(n_steps, n_elements),
+                                            dtype=np.float32,
+                                            chunks=(1, max(min(n_elements, HDF5_CHUNK_VALUES), 1)),
+                                            compression="gzip",
+                                            shuffle=True)
+                for t, row in enumerate(flux):
+                    table[t] = row
+                    if (t + 1) % PROGRESS_INTERVAL == 0:
+                        report(progress, t + 1, n_steps)
+    report(progress, n_steps, n_steps)
+
+
+def export_trajectory(path: str,
+                      points: np.ndarray,
+                      goldak_parameters: np.ndarray,
+                      welding_duration: int,
+                      fmt: str = None,
+                      max_travel_fraction: float = None,
+                      element_centroids: tuple = None,
+                      flux_cutoff: float = 1e-6,
+                      progress=None) -> str:
+    """
+    Export the sampled source trajectory (see trajectory_arrays) in a binary format for other
+    solvers and post-processing, together with the Goldak parameters.
+    `fmt` is one of EXPORT_FORMATS; by default a `path` ending in .h5 or .hdf5 is written as HDF5
+    and any other `path` becomes a directory of .npy files.
+    With `element_centroids` as returned by read_element_centroids, the flux of every step at the
+    centroids is exported as well, with the element IDs, without holding all steps in memory.
+    `progress(done, total)` is called regularly; the export stops with ExportCancelled if it
+    returns False. Returns `path`.
+    """
+    if fmt is None:
+        fmt = "hdf5" if os.path.splitext(path)[1].lower() in HDF5_EXTENSIONS else "npy"
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+
+    arrays = trajectory_arrays(points, goldak_parameters, welding_duration, max_travel_fraction)
+    flux = None
+    n_elements = 0
+    if element_centroids is not None:
+        element_ids, centroids = element_centroids
+        arrays["element_ids"] = np.asarray(element_ids)
+        arrays["centroids"] = np.asarray(centroids, dtype=float)
+        n_elements = len(element_ids)
+        flux = flux_rows(arrays["centroids"], arrays["positions"], arrays["directions"], goldak_parameters, flux_cutoff)
+
+    goldak_parameters = np.asarray(goldak_parameters, dtype=float)
+    if fmt == "hdf5":
+        write_hdf5(path, arrays, flux, n_elements, dict(goldak_parameters=goldak_parameters), progress)
+    else:
+        write_npy(path, dict(arrays, goldak_parameters=goldak_parameters), flux, n_elements, progress)
+    return path
@@ -1,127 +1,734 @@
+import os
+import secrets
+from contextlib import ExitStack, contextmanager
 import numpy as np
-from spline import calculate_position_and_directions
+from trajectory import default_cache
+from schedule import weld_step_times
+from goldak import goldak_flux, peak_flux, source_frames
+
+# How the heat source is applied to the elements at every welding step.
+#   element:     interpreted *DO loop over every element (compatible fallback)
+#   vector:      centroids collected once with *VGET, flux evaluated with *VOPER/*VFUN
+#                and the loads applied in bulk
+#   precomputed: flux evaluated in Python from exported element centroids, the script
+#                only applies the values of the loaded elements
+LOAD_MODES = ("element", "vector", "precomputed")
+
+# Names of the Goldak parameter vector entries, in order
+GOLDAK_PARAMETER_NAMES = ("qval", "c", "b", "af", "ar", "ff", "fr", "convection", "temperature")
+
+# Per-source arrays of the multi-pass script: position, u/v/w frame, ellipsoid lengths and
+# the front and rear flux factors 6*SQRT(3)*f*qval / (pi*SQRT(pi)*a*b*c)
+MULTI_SOURCE_ARRAYS = ("sx0", "sy0", "sz0", "sux", "suy", "suz", "svx", "svy", "svz", "swx", "swy", "swz",
+                       "saf", "sar", "sb", "sc", "skf", "skr")
+
+
+# Rendered text is collected and written in chunks of about this many characters
+BUFFER_SIZE = 4 * 1024 * 1024
+
+# The progress callback is called at least once every this many load steps
+PROGRESS_INTERVAL = 50
+
+
+class ExportCancelled(Exception):
+    """Raised when the progress callback of an export asks to stop."""
+
+
+class WeldPass:
+    """
+    One weld pass or torch: its path control points, Goldak parameters and the start and end
+    time of its travel, in whole seconds of the analysis.
+    """
+
+    def __init__(self, points: np.ndarray, goldak_parameters: np.ndarray, start_time: int, end_time: int):
+        if start_time < 0:
+            raise ValueError(f"A weld pass cannot start before the analysis, got start time {start_time}")
+        if end_time - start_time < 2:
+            raise ValueError(f"A weld pass must last at least 2 s, got {start_time} to {end_time}")
+        self.points = np.asarray(points, dtype=float)
+        self.goldak_parameters = np.asarray(goldak_parameters, dtype=float)
+        self.start_time = int(start_time)
+        self.end_time = int(end_time)
+
+    @property
+    def duration(self) -> int:
+        return self.end_time - self.start_time
+
+
+def read_element_centroids(filepath: str) -> tuple:
+    """
+    Read an element centroid export with rows of element ID, X, Y, Z.
+    Comma, semicolon and whitespace separated files are accepted; header or
+    comment lines that do not start with four numbers are skipped.
+    Returns the integer element IDs and an (n, 3) array of centroids.
+    """
+    rows = []
+    with open(filepath, "r") as file:
+        for line in file:
+            fields = line.replace(",", " ").replace(";", " ").split()
+            if len(fields) < 4:
+                continue
+            try:
+                rows.append([float(v) for v in fields[:4]])
+            except ValueError:
+                continue
+
+    if not rows:
+        raise ValueError(f"No element centroids found in {filepath}")
+
+    data = np.array(rows)
+    return data[:, 0].astype(np.int64), data[:, 1:4]
+
+
+def parameters_block(goldak_parameters: np.ndarray) -> str:
+    return (f"! --------------------------------------------\n"
+            f"! 1) Define Goldak Heat Source Parameters\n"
+            f"! --------------------------------------------\n"
+            f"\n"
+            f"*set,c,{goldak_parameters[1]}\n"
+            f"*set,b,{goldak_parameters[2]}\n"
+            f"*set,af,{goldak_parameters[3]}\n"
+            f"*set,ar,{goldak_parameters[4]}\n"
+            f"*set,ff,{goldak_parameters[5]}\n"
+            f"*set,fr,{goldak_parameters[6]}\n"
+            f"*set,qval,{goldak_parameters[0]}\n"
+            f"*set,pi,3.141592654\n"
+            f"\n")
+
+
+def welding_header_block(goldak_parameters: np.ndarray) -> str:
+    return (f"! --------------------------------------------\n"
+            f"! 2) Perform the Welding Simulation\n"
+            f"! --------------------------------------------\n"
+            f"\n"
+            f"*get,maxelem,elem,0,num,max\n"
+            f"\n"
+            f"cm_sel='surfaces'\n"
+            f"cmsel,s,cm_sel\n"
+            f"sfe,all,conv,,{goldak_parameters[7]},{goldak_parameters[8]}\n"
+            f"allsel,all\n"
+            f"\n")
+
+
+def vector_setup_block(flux_cutoff: float) -> str:
+    """Collect the element centroids once and allocate the work arrays of the vector mode."""
+    text = (f"! Element centroids are collected once, the flux is evaluated with array operations\n"
+            f"*dim,eids,array,maxelem\n"
+            f"*vfill,eids(1),ramp,1,1\n"
+            f"*dim,emask,array,maxelem\n"
+            f"*vget,emask(1),elem,1,esel\n"
+            f"*dim,ecx,array,maxelem\n"
+            f"*dim,ecy,array,maxelem\n"
+            f"*dim,ecz,array,maxelem\n"
+            f"*vget,ecx(1),elem,1,cent,x\n"
+            f"*vget,ecy(1),elem,1,cent,y\n"
+            f"*vget,ecz(1),elem,1,cent,z\n"
+            f"*voper,emask(1),emask(1),gt,0\n")
+    for name in ("dx", "dy", "dz", "parx", "pary", "parz", "vfront", "va", "vf", "vexp", "vq", "vtmp", "qmask"):
+        text += f"*dim,{name},array,maxelem\n"
+    text += (f"\n"
+             f"daf = af - ar\n"
+             f"dff = ff - fr\n"
+             f"kbc = 6*SQRT(3)*qval / (pi*SQRT(pi)*b*c)\n"
+             f"qfront = kbc*ff/af\n"
+             f"qrear = kbc*fr/ar\n"
+             f"*IF,qfront,GE,qrear,THEN\n"
+             f"\tqpeak = qfront\n"
+             f"*ELSE\n"
+             f"\tqpeak = qrear\n"
+             f"*ENDIF\n"
+             f"qcut = {flux_cutoff}*qpeak\n"
+             f"\n")
+    return text
+
+
+def step_block(wtime: float, culled: bool = False) -> str:
+    """Step time and removal of the previous step's heat generation."""
+    text = (f"wtime={wtime}\n"
+            f"time,wtime\n"
+            f"\n")
+    if culled:
+        return text + culled_clear_block()
+    return text + (f"bfe,all,hgen,0,0\n"
+                   f"\n")
+
+
+def source_block(position: np.ndarray, direction: np.ndarray) -> str:
+    """Source position and the local u/v/w frame of the source."""
+    return (f"x0={position[0]}\n"
+            f"y0={position[1]}\n"
+            f"z0={position[2]}\n"
+            f"\n"
+            f"ux={direction[0]}\n"
+            f"uy={direction[1]}\n"
+            f"uz={direction[2]}\n"
+            f"\n"
+            f"unorm = SQRT(ux**2 + uy**2 + uz**2)\n"
+            f"ux = ux/unorm\n"
+            f"uy = uy/unorm\n"
+            f"uz = uz/unorm\n"
+            f"\n"
+            f"*IF, ABS(ux), LE, 0.9, THEN\n"
+            f"\trx = 1\n"
+            f"\try = 0\n"
+            f"\trz = 0\n"
+            f"\n"
+            f"*ELSE\n"
+            f"\trx = 0\n"
+            f"\try = 1\n"
+            f"\trz = 0\n"
+            f"*ENDIF\n"
+            f"\n"
+            f"vx = uy*rz - uz*ry\n"
+            f"vy = uz*rx - ux*rz\n"
+            f"vz = ux*ry - uy*rx\n"
+            f"vnorm = SQRT(vx**2 + vy**2 + vz**2)\n"
+            f"vx = vx/vnorm\n"
+            f"vy = vy/vnorm\n"
+            f"vz = vz/vnorm\n"
+            f"\n"
+            f"wx = uy*vz - uz*vy\n"
+            f"wy = uz*vx - ux*vz\n"
+            f"wz = ux*vy - uy*vx\n"
+            f"\n")
+
+
+def element_load_block(culled: bool = False) -> str:
+    """
+    Evaluate and apply the Goldak flux element by element.
+    When `culled`, only the elements selected by `culled_selection_block` are visited.
+    """
+    if culled:
+        loop = (f"eid = 0\n"
+                f"*do,ie,1,hzcount,1\n"
+                f"\teid = elnext(eid)\n")
+    else:
+        loop = f"*do,eid,1,maxelem,1\n"
+    return (loop +
+            f"\t*GET,ex,elem,eid,CENT,X\n"
+            f"\t*GET,ey,elem,eid,CENT,Y\n"
+            f"\t*GET,ez,elem,eid,CENT,Z\n"
+            f"\n"
+            f"\tdx = ex - x0\n"
+            f"\tdy = ey - y0\n"
+            f"\tdz = ez - z0\n"
+            f"\n"
+            f"\tparx = ux*dx + uy*dy + uz*dz\n"
+            f"\tpary = vx*dx + vy*dy + vz*dz\n"
+            f"\tparz = wx*dx + wy*dy + wz*dz\n"
+            f"\n"
+            f"\t*IF,parx,GE,0,THEN\n"
+            f"\t\ta = af\n"
+            f"\t\tf = ff\n"
+            f"\t*ELSE\n"
+            f"\t\ta = ar\n"
+            f"\t\tf = fr\n"
+            f"\t*ENDIF\n"
+            f"\n"
+            f"\tk = 6*SQRT(3)*f*qval / (pi*SQRT(pi)*a*b*c)\n"
+            f"\ttempExp = -3*((parx/a)**2 + (pary/b)**2 + (parz/c)**2)\n"
+            f"\tq_effect = k*EXP(tempExp)\n"
+            f"\tbfe,eid,HGEN,,q_effect\n"
+            f"\n"
+            f"*enddo\n"
+            f"\n")
+
+
+def culled_header_block(goldak_parameters: np.ndarray, cull_radii: float) -> str:
+    """Padding of the heat-affected bounding box used by the culled modes."""
+    pad = cull_radii * max(goldak_parameters[1:5])
+    return (f"! Only elements within {cull_radii} ellipsoid radii of the source are loaded\n"
+            f"hzpad = {pad}\n"
+            f"hzdef = 0\n"
+            f"\n")
+
+
+def culled_clear_block() -> str:
+    """Remove the heat generation of the previous step's heat-affected elements only."""
+    return (f"*IF,hzdef,EQ,1,THEN\n"
+            f"\tcmsel,s,hz_prev\n"
+            f"\tbfe,all,hgen,0,0\n"
+            f"*ENDIF\n"
+            f"\n")
+
+
+def culled_selection_block() -> str:
+    """Select the elements whose centroid lies in the padded box around the source."""
+    return (f"esel,s,cent,x,x0-hzpad,x0+hzpad\n"
+            f"esel,r,cent,y,y0-hzpad,y0+hzpad\n"
+            f"esel,r,cent,z,z0-hzpad,z0+hzpad\n"
+            f"*get,hzcount,elem,0,count\n"
+            f"*IF,hzcount,GT,0,THEN\n"
+            f"\tcm,hz_prev,elem\n"
+            f"\thzdef = 1\n"
+            f"*ENDIF\n"
+            f"\n")
+
+
+def vector_load_block() -> str:
+    """Evaluate the Goldak flux on the centroid arrays and apply it in one pass."""
+    text = (f"*voper,dx(1),ecx(1),sub,x0\n"
+            f"*voper,dy(1),ecy(1),sub,y0\n"
+            f"*voper,dz(1),ecz(1),sub,z0\n"
+            f"\n")
+    for par, (ax, ay, az) in (("parx", ("ux", "uy", "uz")),
+                              ("pary", ("vx", "vy", "vz")),
+                              ("parz", ("wx", "wy", "wz"))):
+        text += (f"*voper,{par}(1),dx(1),mult,{ax}\n"
+                 f"*voper,vtmp(1),dy(1),mult,{ay}\n"
+                 f"*voper,{par}(1),{par}(1),add,vtmp(1)\n"
+                 f"*voper,vtmp(1),dz(1),mult,{az}\n"
+                 f"*voper,{par}(1),{par}(1),add,vtmp(1)\n")
+    text += (f"\n"
+             f"*voper,vfront(1),parx(1),ge,0\n"
+             f"*voper,va(1),vfront(1),mult,daf\n"
+             f"*voper,va(1),va(1),add,ar\n"
+             f"*voper,vf(1),vfront(1),mult,dff\n"
+             f"*voper,vf(1),vf(1),add,fr\n"
+             f"\n"
+             f"*voper,vexp(1),parx(1),div,va(1)\n"
+             f"*voper,vexp(1),vexp(1),mult,vexp(1)\n"
+             f"*voper,vtmp(1),pary(1),div,b\n"
+             f"*voper,vtmp(1),vtmp(1),mult,vtmp(1)\n"
+             f"*voper,vexp(1),vexp(1),add,vtmp(1)\n"
+             f"*voper,vtmp(1),parz(1),div,c\n"
+             f"*voper,vtmp(1),vtmp(1),mult,vtmp(1)\n"
+             f"*voper,vexp(1),vexp(1),add,vtmp(1)\n"
+             f"*voper,vexp(1),vexp(1),mult,-3\n"
+             f"*vfun,vq(1),exp,vexp(1)\n"
+             f"\n"
+             f"*voper,vtmp(1),vf(1),div,va(1)\n"
+             f"*voper,vtmp(1),vtmp(1),mult,kbc\n"
+             f"*voper,vq(1),vq(1),mult,vtmp(1)\n"
+             f"\n"
+             f"*voper,qmask(1),vq(1),gt,qcut\n"
+             f"*voper,qmask(1),qmask(1),mult,emask(1)\n"
+             f"*cfopen,hgen_step,inp\n"
+             f"*vmask,qmask(1)\n"
+             f"*vwrite,eids(1),vq(1)\n"
+             f"('bfe,',F10.0,',hgen,,',E16.8)\n"
+             f"*cfclos\n"
+             f"*use,hgen_step.inp\n"
+             f"\n")
+    return text
+
+
+def precomputed_load_block(element_ids: np.ndarray, flux: np.ndarray, flux_threshold: float) -> str:
+    """Apply precomputed flux values to the elements above `flux_threshold`."""
+    loaded = flux > flux_threshold
+    lines = [f"bfe,{eid},hgen,,{q:.8e}\n" for eid, q in zip(element_ids[loaded], flux[loaded])]
+    return "".join(lines) + "\n"
+
+
+def compact_table_block(table_filename: str, n_steps: int) -> str:
+    """Read the per-step source table written next to the script by the compact mode."""
+    name, ext = os.path.splitext(table_filename)
+    return (f"! Source table (wtime, x0, y0, z0, ux, uy, uz), keep {table_filename} next to this script\n"
+            f"nsteps = {n_steps}\n"
+            f"*dim,wpath,array,nsteps,7\n"
+            f"*vread,wpath(1,1),{name},{ext[1:]},,jik,7,nsteps\n"
+            f"(7E24.15)\n"
+            f"\n")
+
+
+def cooling_header_block() -> str:
+    return (f"! --------------------------------------------\n"
+            f"! 3) Perform the Cooling Simulation\n"
+            f"! --------------------------------------------\n"
+            f"\n")
+
+
+def cooling_step_block(wtime: float) -> str:
+    return (f"wtime={wtime}\n"
+            f"time,wtime\n"
+            f"\n"
+            f"bfe,all,hgen,0,0\n"
+            f"\n"
+            f"solve\n"
+            f"\n")
+
+
+def cooling_step_end_times(welding_duration: int, cooling_duration: int, cooling_times: np.ndarray = None) -> list:
+    """End times of the cooling load steps: 1 s steps, or `cooling_times` after the end of welding."""
+    if cooling_times is None:
+        return [td + 1 + welding_duration for td in range(cooling_duration)]
+    return [welding_duration + td for td in cooling_times]
+
+
+def welding_steps(points: np.ndarray,
+                  goldak_parameters: np.ndarray,
+                  welding_duration: int,
+                  max_travel_fraction: float = None) -> tuple:
+    """
+    Load step end times, source positions and travel directions of the welding phase:
+    1 s steps, or the adaptive steps of `max_travel_fraction` (see write_apdl_commands).
+    """
+    step_times = range(1, welding_duration + 1)
+    sample_times = None
+    if max_travel_fraction:
+        if not goldak_parameters[3] > 0:
+            raise ValueError("Adaptive load steps need a positive front length af (C Front)")
+        step_times, sample_times = weld_step_times(default_cache.get(points).length,
+                                                   welding_duration,
+                                                   max_travel_fraction * goldak_parameters[3])
+
+    total_length, speed, positions, directions = default_cache.sample(points, welding_duration, sample_times)
+    return step_times, positions, directions
+
+
+def create_temp_file(filepath: str, suffix: str = ".tmp") -> tuple:
+    """
+    Create a new hidden file next to `filepath` and return its descriptor and path. Like open(),
+    the file gets mode 0o666 less the process umask, which the OS applies.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        temp_path = os.path.join(directory, f".{os.path.basename(filepath)}.{secrets.token_hex(8)}{suffix}")
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_path(filepath: str, suffix: str = ".tmp"):
+    """
+    Path of a new temporary file next to `filepath` that replaces it only if the block succeeds.
+    The block has to close the file before it ends.
+    """
+    fd, temp_path = create_temp_file(filepath, suffix)
+    os.close(fd)
+    try:
+        yield temp_path
+        os.replace(temp_path, filepath)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def atomic_open(filepath: str):
+    """Open a temporary file next to `filepath` that replaces it only if the block succeeds."""
+    with atomic_path(filepath) as temp_path:
+        with open(temp_path, "w") as file:
+            yield file
+
+
+def multi_source_setup_block(max_sources: int) -> str:
+    """Arrays holding the position, frame and Goldak terms of the sources active at a step."""
+    text = (f"! Sources active at the current step, summed in one pass over the elements\n"
+            f"*set,pi,3.141592654\n"
+            f"nsrc = 0\n")
+    for name in MULTI_SOURCE_ARRAYS:
+        text += f"*dim,{name},array,{max_sources}\n"
+    return text + "\n"
+
+
+def multi_source_block(positions: np.ndarray, directions: np.ndarray, goldak_parameters: list) -> str:
+    """Fill the source arrays with the active sources of one step; frames are computed here."""
+    u, v, w = source_frames(np.asarray(directions, dtype=float))
+    text = f"nsrc = {len(positions)}\n"
+    for i, (position, g) in enumerate(zip(positions, goldak_parameters)):
+        qval, c, b, af, ar, ff, fr = g[:7]
+        kbc = 6 * np.sqrt(3) * qval / (np.pi * np.sqrt(np.pi) * b * c)
+        values = (*position, *u[i], *v[i], *w[i], af, ar, b, c, kbc * ff / af, kbc * fr / ar)
+        text += "".join(f"{name}({i + 1})={value}\n" for name, value in zip(MULTI_SOURCE_ARRAYS, values))
+    return text + "\n"
+
+
+def multi_element_load_block() -> str:
+    """Visit every element once and apply the summed flux of all active sources."""
+    return (f"*do,eid,1,maxelem,1\n"
+            f"\t*GET,ex,elem,eid,CENT,X\n"
+            f"\t*GET,ey,elem,eid,CENT,Y\n"
+            f"\t*GET,ez,elem,eid,CENT,Z\n"
+            f"\n"
+            f"\tq_effect = 0\n"
+            f"\t*do,isrc,1,nsrc,1\n"
+            f"\t\tdx = ex - sx0(isrc)\n"
+            f"\t\tdy = ey - sy0(isrc)\n"
+            f"\t\tdz = ez - sz0(isrc)\n"
+            f"\n"
+            f"\t\tparx = sux(isrc)*dx + suy(isrc)*dy + suz(isrc)*dz\n"
+            f"\t\tpary = svx(isrc)*dx + svy(isrc)*dy + svz(isrc)*dz\n"
+            f"\t\tparz = swx(isrc)*dx + swy(isrc)*dy + swz(isrc)*dz\n"
+            f"\n"
+            f"\t\t*IF,parx,GE,0,THEN\n"
+            f"\t\t\ta = saf(isrc)\n"
+            f"\t\t\tk = skf(isrc)\n"
+            f"\t\t*ELSE\n"
+            f"\t\t\ta = sar(isrc)\n"
+            f"\t\t\tk = skr(isrc)\n"
+            f"\t\t*ENDIF\n"
+            f"\n"
+            f"\t\ttempExp = -3*((parx/a)**2 + (pary/sb(isrc))**2 + (parz/sc(isrc))**2)\n"
+            f"\t\tq_effect = q_effect + k*EXP(tempExp)\n"
+            f"\t*enddo\n"
+            f"\tbfe,eid,HGEN,,q_effect\n"
+            f"\n"
+            f"*enddo\n"
+            f"\n")
+
+
+def check_passes(passes: list):
+    """
+    Raise ValueError unless all passes share the convection coefficient and bulk temperature,
+    which the script applies once to the whole surface.
+    """
+    if len({tuple(p.goldak_parameters[7:9]) for p in passes}) > 1:
+        raise ValueError("All weld passes must use the same convection coefficient and temperature")
+
+
+def multi_pass_steps(passes: list) -> list:
+    """
+    1 s load steps from the first start to the last end of the passes, each with the
+    (pass index, step index within the pass) of the passes welding during it. If no pass
+    starts at 0, an idle step without source comes first.
+    """
+    first = min(p.start_time for p in passes)
+    last = max(p.end_time for p in passes)
+    steps = [(first, [])] if first > 0 else []
+    for wtime in range(first + 1, last + 1):
+        active = [(i, wtime - p.start_time - 1) for i, p in enumerate(passes) if p.start_time < wtime <= p.end_time]
+        steps.append((wtime, active))
+    return steps
+
+
+def apdl_blocks(goldak_parameters: np.ndarray,
+                step_times,
+                positions: np.ndarray,
+                directions: np.ndarray,
+                cooling_step_times: list,
+                mode: str = "element",
+                flux_cutoff: float = 1e-6,
+                element_centroids: tuple = None,
+                cull_radii: float = None,
+                table_filename: str = None, ):
+    """
+    Render the APDL script block by block.
+    Yields `(text, done, total)` where `done` of `total` load steps have been rendered so far.
+    With `table_filename`, the welding phase is the compact *DO loop over that step table.
+    """
+    culled = bool(cull_radii) and mode != "precomputed"
+
+    if mode == "vector":
+        load_block = vector_load_block()
+        if culled:
+            load_block = (culled_selection_block() +
+                          f"*vget,emask(1),elem,1,esel\n"
+                          f"*voper,emask(1),emask(1),gt,0\n"
+                          f"\n" +
+                          load_block)
+    elif mode == "element":
+        load_block = element_load_block(culled)
+        if culled:
+            load_block = culled_selection_block() + load_block
+    if culled:
+        load_block += (f"allsel,all\n"
+                       f"\n")
+
+    n_welding = 1 if table_filename else len(step_times)
+    total = n_welding + len(cooling_step_times)
+
+    header = parameters_block(goldak_parameters) + welding_header_block(goldak_parameters)
+    if mode == "vector":
+        header += vector_setup_block(flux_cutoff)
+    if culled:
+        header += culled_header_block(goldak_parameters, cull_radii)
+    yield header, 0, total
+
+    if table_filename:
+        yield (compact_table_block(table_filename, len(step_times)) +
+               f"*do,istep,1,nsteps,1\n" +
+               step_block("wpath(istep,1)", culled) +
+               source_block([f"wpath(istep,{j})" for j in (2, 3, 4)],
+                            [f"wpath(istep,{j})" for j in (5, 6, 7)]) +
+               load_block +
+               f"solve\n"
+               f"\n"
+               f"*enddo\n"
+               f"\n"), 1, total
+    else:
+        if mode == "precomputed":
+            element_ids, centroids = element_centroids
+            flux_threshold = flux_cutoff * peak_flux(goldak_parameters)
+
+        for t, wtime in enumerate(step_times):
+            text = step_block(wtime, culled)
+            if mode == "precomputed":
+                flux = goldak_flux(centroids, positions[t], directions[t], goldak_parameters)
+                text += precomputed_load_block(element_ids, flux, flux_threshold)
+            else:
+                text += source_block(positions[t], directions[t]) + load_block
+            yield text + (f"solve\n"
+                          f"\n"), t + 1, total
+
+    yield cooling_header_block(), n_welding, total
+    for i, wtime in enumerate(cooling_step_times):
+        yield cooling_step_block(wtime), n_welding + i + 1, total
 
 
 def write_apdl_commands(filepath: str,
                         points: np.ndarray,
                         goldak_parameters: np.ndarray,
                         welding_duration: int,
-                        cooling_duration: int, ):
-    total_length, speed, positions, directions = calculate_position_and_directions(points, welding_duration)
-
-    file = open(filepath, "w")
-
-    file.write(f"! --------------------------------------------\n")
-    file.write(f"! 1) Define Goldak Heat Source Parameters\n")
-    file.write(f"! --------------------------------------------\n")
-    file.write(f"\n")
-    file.write(f"*set,c,{goldak_parameters[1]}\n")
-    file.write(f"*set,b,{goldak_parameters[2]}\n")
-    file.write(f"*set,af,{goldak_parameters[3]}\n")
-    file.write(f"*set,ar,{goldak_parameters[4]}\n")
-    file.write(f"*set,ff,{goldak_parameters[5]}\n")
-    file.write(f"*set,fr,{goldak_parameters[6]}\n")
-    file.write(f"*set,qval,{goldak_parameters[0]}\n")
-    file.write(f"*set,pi,3.141592654\n")
-    file.write(f"\n")
-    file.write(f"! --------------------------------------------\n")
-    file.write(f"! 2) Perform the Welding Simulation\n")
-    file.write(f"! --------------------------------------------\n")
-    file.write(f"\n")
-    file.write(f"*get,maxelem,elem,0,num,max\n")
-    file.write(f"\n")
-    file.write(f"cm_sel='surfaces'\n")
-    file.write(f"cmsel,s,cm_sel\n")
-    file.write(f"sfe,all,conv,,{goldak_parameters[7]},{goldak_parameters[8]}\n")
-    file.write(f"allsel,all\n")
-    file.write(f"\n")
-
-    for t in range(welding_duration):
-        file.write(f"wtime={t + 1}\n")
-        file.write(f"time,wtime\n")
-        file.write(f"\n")
-        file.write(f"bfe,all,hgen,0,0\n")
-        file.write(f"\n")
-        file.write(f"x0={positions[t][0]}\n")
-        file.write(f"y0={positions[t][1]}\n")
-        file.write(f"z0={positions[t][2]}\n")
-        file.write(f"\n")
-        file.write(f"ux={directions[t][0]}\n")
-        file.write(f"uy={directions[t][1]}\n")
-        file.write(f"uz={directions[t][2]}\n")
-        file.write(f"\n")
-        file.write(f"unorm = SQRT(ux**2 + uy**2 + uz**2)\n")
-        file.write(f"ux = ux/unorm\n")
-        file.write(f"uy = uy/unorm\n")
-        file.write(f"uz = uz/unorm\n")
-        file.write(f"\n")
-        file.write(f"*IF, ABS(ux), LE, 0.9, THEN\n")
-        file.write(f"\trx = 1\n")
-        file.write(f"\try = 0\n")
-        file.write(f"\trz = 0\n")
-        file.write(f"\n")
-        file.write(f"*ELSE\n")
-        file.write(f"\trx = 0\n")
-        file.write(f"\try = 1\n")
-        file.write(f"\trz = 0\n")
-        file.write(f"*ENDIF\n")
-        file.write(f"\n")
-        file.write(f"vx = uy*rz - uz*ry\n")
-        file.write(f"vy = uz*rx - ux*rz\n")
-        file.write(f"vz = ux*ry - uy*rx\n")
-        file.write(f"vnorm = SQRT(vx**2 + vy**2 + vz**2)\n")
-        file.write(f"vx = vx/vnorm\n")
-        file.write(f"vy = vy/vnorm\n")
-        file.write(f"vz = vz/vnorm\n")
-        file.write(f"\n")
-        file.write(f"wx = uy*vz - uz*vy\n")
-        file.write(f"wy = uz*vx - ux*vz\n")
-        file.write(f"wz = ux*vy - uy*vx\n")
-        file.write(f"\n")
-        file.write(f"*do,eid,1,maxelem,1\n")
-        file.write(f"\t*GET,ex,elem,eid,CENT,X\n")
-        file.write(f"\t*GET,ey,elem,eid,CENT,Y\n")
-        file.write(f"\t*GET,ez,elem,eid,CENT,Z\n")
-        file.write(f"\n")
-        file.write(f"\tdx = ex - x0\n")
-        file.write(f"\tdy = ey - y0\n")
-        file.write(f"\tdz = ez - z0\n")
-        file.write(f"\n")
-        file.write(f"\tparx = ux*dx + uy*dy + uz*dz\n")
-        file.write(f"\tpary = vx*dx + vy*dy + vz*dz\n")
-        file.write(f"\tparz = wx*dx + wy*dy + wz*dz\n")
-        file.write(f"\n")
-        file.write(f"\t*IF,parx,GE,0,THEN\n")
-        file.write(f"\t\ta = af\n")
-        file.write(f"\t\tf = ff\n")
-        file.write(f"\t*ELSE\n")
-        file.write(f"\t\ta = ar\n")
-        file.write(f"\t\tf = fr\n")
-        file.write(f"\t*ENDIF\n")
-        file.write(f"\n")
-        file.write(f"\tk = 6*SQRT(3)*f*qval / (pi*SQRT(pi)*a*b*c)\n")
-        file.write(f"\ttempExp = -3*((parx/a)**2 + (pary/b)**2 + (parz/c)**2)\n")
-        file.write(f"\tq_effect = k*EXP(tempExp)\n")
-        file.write(f"\tbfe,eid,HGEN,,q_effect\n")
-        file.write(f"\n")
-        file.write(f"*enddo\n")
-        file.write(f"\n")
-        file.write(f"solve\n")
-        file.write(f"\n")
-
-    file.write(f"! --------------------------------------------\n")
-    file.write(f"! 3) Perform the Cooling Simulation\n")
-    file.write(f"! --------------------------------------------\n")
-    file.write(f"\n")
-
-    for td in range(cooling_duration):
-        td = td + 1 + welding_duration
-        file.write(f"wtime={td}\n")
-        file.write(f"time,wtime\n")
-        file.write(f"\n")
-        file.write(f"bfe,all,hgen,0,0\n")
-        file.write(f"\n")
-        file.write(f"solve\n")
-        file.write(f"\n")
-
-    file.close()
+                        cooling_duration: int,
+                        mode: str = "element",
+                        flux_cutoff: float = 1e-6,
+                        element_centroids: tuple = None,
+                        cull_radii: float = None,
+                        max_travel_fraction: float = None,
+                        cooling_times: np.ndarray = None,
+                        compact: bool = False,
+                        progress=None,
+                        trajectory: tuple = None, ):
+    """
+    Write the APDL script of the moving Goldak heat source.
+    `mode` selects how the flux is applied (see LOAD_MODES); in the vector and precomputed modes
+    elements whose flux is below `flux_cutoff` times the peak flux are left unloaded.
+    The precomputed mode needs `element_centroids` as returned by `read_element_centroids`.
+    With `cull_radii`, the element and vector modes only load the elements inside a box around the
+    source padded by that many of the largest ellipsoid radius, and only clear the previous step's box.
+    The precomputed mode already writes only the heated elements and ignores it.
+    With `max_travel_fraction`, the welding phase is split into the fewest equal load steps in which
+    the source travels at most that fraction of the front length `af`, instead of 1 s steps.
+    `cooling_times` are the cooling load step end times after the end of welding (see
+    schedule.cooling_step_times); they replace the 1 s steps of `cooling_duration`.
+    With `compact`, the per-step source table is written to a "<script>_steps.txt" side file and the
+    welding phase becomes a single *DO loop over its rows (element and vector modes only).
+    `progress(done, total)` is called regularly with the number of rendered load steps; the export
+    stops with ExportCancelled if it returns False. Files are only replaced once fully written.
+    A `trajectory` returned by `welding_steps` for the same arguments skips refitting the path.
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode '{mode}', expected one of {LOAD_MODES}")
+    if mode == "precomputed" and element_centroids is None:
+        raise ValueError("The precomputed load mode needs the element centroids")
+    if compact and mode == "precomputed":
+        raise ValueError("The compact output is not available in the precomputed load mode")
+
+    if trajectory is None:
+        trajectory = welding_steps(points, goldak_parameters, welding_duration, max_travel_fraction)
+    step_times, positions, directions = trajectory
+
+    # the step table is only put in place together with a complete script
+    with ExitStack() as stack:
+        table_filename = None
+        if compact:
+            table_path = os.path.splitext(filepath)[0] + "_steps.txt"
+            file = stack.enter_context(atomic_open(table_path))
+            np.savetxt(file,
+                       np.column_stack((np.asarray(step_times, dtype=float), positions, directions)),
+                       fmt="%24.15E",
+                       delimiter="")
+            table_filename = os.path.basename(table_path)
+
+        blocks = apdl_blocks(goldak_parameters,
+                             step_times,
+                             positions,
+                             directions,
+                             cooling_step_end_times(welding_duration, cooling_duration, cooling_times),
+                             mode=mode,
+                             flux_cutoff=flux_cutoff,
+                             element_centroids=element_centroids,
+                             cull_radii=cull_radii,
+                             table_filename=table_filename)
+
+        write_blocks(filepath, blocks, progress)
+
+
+def write_blocks(filepath: str, blocks, progress=None):
+    """Write the `(text, done, total)` blocks of a script atomically in BUFFER_SIZE chunks."""
+    with atomic_open(filepath) as file:
+        buffer = []
+        size = 0
+        reported = 0
+        for text, done, total in blocks:
+            buffer.append(text)
+            size += len(text)
+            if size >= BUFFER_SIZE:
+                file.write("".join(buffer))
+                buffer.clear()
+                size = 0
+            if progress is not None and (done - reported >= PROGRESS_INTERVAL or size == 0):
+                reported = done
+                if progress(done, total) is False:
+                    raise ExportCancelled()
+        file.write("".join(buffer))
+
+    if progress is not None:
+        progress(total, total)
+
+
+def multi_pass_blocks(passes: list,
+                      trajectories: list,
+                      cooling_step_times: list,
+                      mode: str = "element",
+                      flux_cutoff: float = 1e-6,
+                      element_centroids: tuple = None):
+    """Render the script of several passes block by block, yielding `(text, done, total)` like apdl_blocks."""
+    steps = multi_pass_steps(passes)
+    total = len(steps) + len(cooling_step_times)
+
+    header = welding_header_block(passes[0].goldak_parameters)
+    if mode == "element":
+        header += multi_source_setup_block(max(len(active) for _, active in steps))
+    else:
+        element_ids, centroids = element_centroids
+        flux_threshold = flux_cutoff * min(peak_flux(p.goldak_parameters) for p in passes)
+    yield header, 0, total
+
+    for t, (wtime, active) in enumerate(steps):
+        text = step_block(wtime)
+        if active and mode == "element":
+            text += (multi_source_block([trajectories[i][1][j] for i, j in active],
+                                        [trajectories[i][2][j] for i, j in active],
+                                        [passes[i].goldak_parameters for i, _ in active]) +
+                     multi_element_load_block())
+        elif active:
+            flux = sum(goldak_flux(centroids, trajectories[i][1][j], trajectories[i][2][j], passes[i].goldak_parameters)
+                       for i, j in active)
+            text += precomputed_load_block(element_ids, flux, flux_threshold)
+        yield text + (f"solve\n"
+                      f"\n"), t + 1, total
+
+    yield cooling_header_block(), len(steps), total
+    for i, wtime in enumerate(cooling_step_times):
+        yield cooling_step_block(wtime), len(steps) + i + 1, total
+
+
+def write_multi_pass_commands(filepath: str,
+                              passes: list,
+                              cooling_duration: int,
+                              mode: str = "element",
+                              flux_cutoff: float = 1e-6,
+                              element_centroids: tuple = None,
+                              cooling_times: np.ndarray = None,
+                              progress=None):
+    """
+    Write one APDL script for several weld passes or torches (a list of WeldPass), in 1 s load
+    steps from the first start to the last end, after an idle step up to the first start. At every step the sources of all passes welding
+    during it are summed in a single pass over the elements, so a step costs one element sweep
+    however many torches are active. Steps without an active pass only clear the heat generation.
+    All passes must share the convection coefficient and temperature (see check_passes).
+    Only the element and precomputed load modes are available; cooling, `flux_cutoff` (relative to
+    the smallest peak flux of the passes) and `progress` work as in write_apdl_commands.
+    """
+    if not passes:
+        raise ValueError("At least one weld pass is needed")
+    check_passes(passes)
+    if mode not in ("element", "precomputed"):
+        raise ValueError(f"Load mode '{mode}' is not available for several passes, use 'element' or 'precomputed'")
+    if mode == "precomputed" and element_centroids is None:
+        raise ValueError("The precomputed load mode needs the element centroids")
+
+    trajectories = [welding_steps(p.points, p.goldak_parameters, p.duration) for p in passes]
+    last = max(p.end_time for p in passes)
+    blocks = multi_pass_blocks(passes,
+                               trajectories,
+                               cooling_step_end_times(last, cooling_duration, cooling_times),
+                               mode=mode,
+                               flux_cutoff=flux_cutoff,
+                               element_centroids=element_centroids)
+    write_blocks(filepath, blocks, progress)
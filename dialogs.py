@@ -0,0 +1,150 @@
+import numpy as np
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel,
+    QLineEdit, QPushButton, QFileDialog, QDialogButtonBox, QTableView, QSpinBox,
+    QHeaderView, QGridLayout, QMessageBox)
+from PySide6.QtGui import QDoubleValidator
+
+import table_editor as te
+
+
+class SweepDialog(QDialog):
+    """Ask for the values of the swept Goldak parameters and the output directory."""
+
+    def __init__(self, parent, labels, names):
+        super().__init__(parent)
+        self.setWindowTitle("Goldak Parameter Sweep")
+        self.names = names
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Values to sweep, e.g. \"4,5,6\" or \"400000:800000:5\" (start:stop:num).\n"
+                                "Leave empty to keep the current value."))
+
+        self.table_values = QTableWidget(len(labels), 1)
+        self.table_values.setVerticalHeaderLabels(labels)
+        self.table_values.setHorizontalHeaderLabels(["Values"])
+        self.table_values.horizontalHeader().setStretchLastSection(True)
+        for i in range(len(labels)):
+            self.table_values.setItem(i, 0, QTableWidgetItem(""))
+        layout.addWidget(self.table_values)
+
+        layout_output = QHBoxLayout()
+        self.input_output_dir = QLineEdit()
+        self.input_output_dir.setPlaceholderText("Output directory")
+        layout_output.addWidget(self.input_output_dir)
+        button_browse = QPushButton("Browse")
+        button_browse.clicked.connect(self.browse_output_dir)
+        layout_output.addWidget(button_browse)
+        layout.addLayout(layout_output)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.setLayout(layout)
+        self.resize(420, 480)
+
+    def browse_output_dir(self):
+        path = QFileDialog.getExistingDirectory(self, "Sweep Output Directory")
+        if path:
+            self.input_output_dir.setText(path)
+
+    def ranges(self) -> dict:
+        """Value specifications of the swept parameters, keyed by parameter name."""
+        ranges = {}
+        for i, name in enumerate(self.names):
+            item = self.table_values.item(i, 0)
+            if item is not None and item.text().strip():
+                ranges[name] = item.text().strip()
+        return ranges
+
+    def output_dir(self) -> str:
+        return self.input_output_dir.text().strip()
+
+
+class MeshPointsDialog(QDialog):
+    """Browse the mesh points with jump-to-ID and a coordinate range filter."""
+
+    def __init__(self, parent, points: np.ndarray):
+        super().__init__(parent)
+        self.setWindowTitle("All Mesh Points (ID, X, Y, Z)")
+        self.model = te.MeshPointsModel(points, self)
+
+        layout = QVBoxLayout()
+
+        layout_jump = QHBoxLayout()
+        layout_jump.addWidget(QLabel("Point ID:"))
+        self.spinbox_id = QSpinBox()
+        self.spinbox_id.setMaximum(max(points.shape[0] - 1, 0))
+        layout_jump.addWidget(self.spinbox_id)
+        button_jump = QPushButton("Go")
+        button_jump.clicked.connect(self.jump_to_id)
+        layout_jump.addWidget(button_jump)
+        layout.addLayout(layout_jump)
+
+        layout_filter = QGridLayout()
+        self.inputs_lower = []
+        self.inputs_upper = []
+        for axis, name in enumerate("XYZ"):
+            layout_filter.addWidget(QLabel(f"{name} from"), axis, 0)
+            lower = QLineEdit()
+            lower.setValidator(QDoubleValidator())
+            layout_filter.addWidget(lower, axis, 1)
+            layout_filter.addWidget(QLabel("to"), axis, 2)
+            upper = QLineEdit()
+            upper.setValidator(QDoubleValidator())
+            layout_filter.addWidget(upper, axis, 3)
+            self.inputs_lower.append(lower)
+            self.inputs_upper.append(upper)
+        button_filter = QPushButton("Filter")
+        button_filter.clicked.connect(self.apply_filter)
+        layout_filter.addWidget(button_filter, 0, 4)
+        button_clear = QPushButton("Clear")
+        button_clear.clicked.connect(self.clear_filter)
+        layout_filter.addWidget(button_clear, 1, 4)
+        layout.addLayout(layout_filter)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setMinimumSize(500, 400)
+        layout.addWidget(self.table)
+
+        self.label_count = QLabel()
+        layout.addWidget(self.label_count)
+        self.update_count()
+
+        self.setLayout(layout)
+        self.resize(600, 600)
+
+    def bounds(self, inputs) -> np.ndarray:
+        return np.array([float(i.text()) if i.text().strip() else np.nan for i in inputs])
+
+    def apply_filter(self):
+        try:
+            self.model.set_filter(self.bounds(self.inputs_lower), self.bounds(self.inputs_upper))
+        except ValueError:
+            QMessageBox.critical(self, "Invalid input", "Please enter numbers for the coordinate range.")
+            return
+        self.update_count()
+
+    def clear_filter(self):
+        for i in self.inputs_lower + self.inputs_upper:
+            i.clear()
+        self.model.set_filter()
+        self.update_count()
+
+    def jump_to_id(self):
+        row = self.model.row_of_id(self.spinbox_id.value())
+        if row < 0:
+            QMessageBox.information(self, "Not shown", "This point is outside the current filter.")
+            return
+        index = self.model.index(row, 0)
+        self.table.scrollTo(index, QTableView.PositionAtCenter)
+        self.table.selectRow(row)
+
+    def update_count(self):
+        self.label_count.setText(f"{self.model.rowCount()} of {self.model.points.shape[0]} points shown")
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+def source_frames(directions: np.ndarray) -> tuple:
+    """
+    Build the local u/v/w frames of the heat source for an (n, 3) array of travel directions,
+    using the same reference vector rule as the generated APDL script.
+    """
+    u = directions / np.linalg.norm(directions, axis=-1, keepdims=True)
+    ref = np.zeros_like(u)
+    use_x = np.abs(u[..., 0]) <= 0.9
+    ref[use_x, 0] = 1.0
+    ref[~use_x, 1] = 1.0
+
+    v = np.cross(u, ref)
+    v /= np.linalg.norm(v, axis=-1, keepdims=True)
+    w = np.cross(u, v)
+    return u, v, w
+
+
+def peak_flux(goldak_parameters: np.ndarray) -> float:
+    """Largest value of the double-ellipsoid flux, reached at the source centre."""
+    qval, c, b, af, ar, ff, fr = goldak_parameters[:7]
+    k = 6 * np.sqrt(3) * qval / (np.pi * np.sqrt(np.pi) * b * c)
+    return max(k * ff / af, k * fr / ar)
+
+
+def goldak_flux(coords: np.ndarray,
+                position: np.ndarray,
+                direction: np.ndarray,
+                goldak_parameters: np.ndarray) -> np.ndarray:
+    """
+    Evaluate the Goldak double-ellipsoid flux at the (n, 3) `coords` for one source position.
+    """
+    qval, c, b, af, ar, ff, fr = goldak_parameters[:7]
+    u, v, w = source_frames(np.asarray(direction, dtype=float)[None, :])
+
+    d = coords - position
+    parx = d @ u[0]
+    pary = d @ v[0]
+    parz = d @ w[0]
+
+    front = parx >= 0
+    a = np.where(front, af, ar)
+    f = np.where(front, ff, fr)
+
+    k = 6 * np.sqrt(3) * f * qval / (np.pi * np.sqrt(np.pi) * a * b * c)
+    return k * np.exp(-3 * ((parx / a) ** 2 + (pary / b) ** 2 + (parz / c) ** 2))
+
+
+def ellipsoid_bounds(position: np.ndarray, direction: np.ndarray, goldak_parameters: np.ndarray) -> tuple:
+    """
+    Axis-aligned bounding box (lower, upper corners) of the rotated double ellipsoid,
+    taking the longer of the front and rear lengths on both sides.
+    """
+    c, b, af, ar = goldak_parameters[1:5]
+    u, v, w = source_frames(np.asarray(direction, dtype=float)[None, :])
+    half = np.sqrt((max(af, ar) * u[0]) ** 2 + (b * v[0]) ** 2 + (c * w[0]) ** 2)
+    return position - half, position + half
+
+
+def ellipsoid_voxels(position: np.ndarray,
+                     direction: np.ndarray,
+                     goldak_parameters: np.ndarray,
+                     spacing: float = 1.0,
+                     origin: np.ndarray = (0.0, 0.0, 0.0),
+                     bounds: np.ndarray = None,
+                     chunk_size: int = 1_000_000):
+    """
+    Yield (points, flux) chunks of the voxels of the regular grid `origin + spacing * index`
+    that lie inside the double ellipsoid of one source position.
+    Only the voxels in the bounding box of the ellipsoid (clipped to the optional
+    [xmin, xmax, ymin, ymax, zmin, zmax] `bounds`) are generated, at most `chunk_size` at a time,
+    so memory depends on the ellipsoid volume and not on the grid size.
+    """
+    position = np.asarray(position, dtype=float)
+    origin = np.asarray(origin, dtype=float)
+    c, b, af, ar = goldak_parameters[1:5]
+    u, v, w = source_frames(np.asarray(direction, dtype=float)[None, :])
+
+    lower, upper = ellipsoid_bounds(position, direction, goldak_parameters)
+    if bounds is not None:
+        bounds = np.asarray(bounds, dtype=float).reshape(3, 2)
+        lower = np.maximum(lower, bounds[:, 0])
+        upper = np.minimum(upper, bounds[:, 1])
+    first = np.ceil((lower - origin) / spacing).astype(int)
+    last = np.floor((upper - origin) / spacing).astype(int)
+    if np.any(last < first):
+        return
+
+    axes = [origin[i] + spacing * np.arange(first[i], last[i] + 1) for i in range(3)]
+    slab = max(chunk_size // (len(axes[1]) * len(axes[2])), 1)
+    for start in range(0, len(axes[0]), slab):
+        X, Y, Z = np.meshgrid(axes[0][start:start + slab], axes[1], axes[2], indexing="ij")
+        coords = np.column_stack((X.ravel(), Y.ravel(), Z.ravel()))
+
+        d = coords - position
+        parx = d @ u[0]
+        a = np.where(parx >= 0, af, ar)
+        inside = (parx / a) ** 2 + (d @ v[0] / b) ** 2 + (d @ w[0] / c) ** 2 < 1.0
+        if inside.any():
+            points = coords[inside]
+            yield points, goldak_flux(points, position, direction, goldak_parameters)
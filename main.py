@@ -1,19 +1,33 @@
 import sys
+import os
+import multiprocessing
 import numpy as np
 import pandas as pd
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QMenuBar, QMenu,
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-    QPushButton, QLabel, QSpinBox, QMessageBox, QLineEdit, QDialog)
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QTableView,
+    QPushButton, QLabel, QSpinBox, QMessageBox, QLineEdit, QComboBox, QDoubleSpinBox, QCheckBox,
+    QProgressDialog, QSlider, QListWidget)
 
 from PySide6.QtGui import QAction, QIcon, QPalette, QColor
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool, QTimer
 from pyvistaqt import QtInteractor
 import pyvista as pv
+from vtkmodules.vtkRenderingCore import vtkWorldPointPicker
 
 import command_writer as cw
+import schedule as sc
 import table_editor as te
-import spline as sp
+import trajectory as tr
+import sweep as sw
+import spatial
+import mesh_cache
+import animation
+import goldak
+import thermal
+import binary_export as be
+from dialogs import SweepDialog, MeshPointsDialog
+from workers import Worker
 
 
 class MainWindow(QMainWindow):
@@ -24,12 +38,61 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(icon)
 
         self.mesh = None
-        self.selected_ids = []
+        self.mesh_index = None
+        self.surface_graph = None
+        self.mesh_actor = None
+        # Decimated copy of a heavy mesh, drawn instead of it while the view is moving
+        self.proxy_actor = None
+        self.selected_ids = spatial.OrderedIdSet()
+        # Table rows of the selected mesh points, in the order of selected_ids; rows imported from CSV have none
+        self.selected_rows = np.empty(0, dtype=int)
         self.spline_actor = None
-        self.point_actors = {}
+        # All selected mesh points are drawn by one actor whose points are updated in place
+        self.selected_points = None
+        self.selected_actor = None
         self.select_mode = False
 
         self.welding_length = 0.0
+        self.path_points = None
+        # Passes (or torches) of a multi-pass export, each with its own path, parameters and times
+        self.weld_passes = []
+        self.element_centroids = None
+        self.export_worker = None
+        self.export_progress = None
+        self.load_worker = None
+        self.load_progress = None
+
+        # Heat-source playback: a worker computes the frames ahead of the playhead, one actor draws them
+        self.frames = None
+        self.frames_worker = None
+        self.animation_cloud = None
+        self.animation_actor = None
+        self.animation_clim = None
+        self.animation_timer = QTimer(self)
+        self.animation_timer.setInterval(100)
+        self.animation_timer.timeout.connect(self.advance_animation)
+
+        # Debounced analytic temperature preview on the mesh nodes
+        self.temperature_update_timer = QTimer(self)
+        self.temperature_update_timer.setSingleShot(True)
+        self.temperature_update_timer.setInterval(300)
+        self.temperature_update_timer.timeout.connect(self.update_temperature)
+        self.temperature_worker = None
+
+        # Coalesces point table edits into one spline rebuild per event-loop pass
+        self.spline_update_timer = QTimer(self)
+        self.spline_update_timer.setSingleShot(True)
+        self.spline_update_timer.setInterval(0)
+        self.spline_update_timer.timeout.connect(self.update_spline)
+
+        # Refreshes the mesh labels once the camera or cursor has settled
+        self.labels_update_timer = QTimer(self)
+        self.labels_update_timer.setSingleShot(True)
+        self.labels_update_timer.setInterval(100)
+        self.labels_update_timer.timeout.connect(self.update_labels)
+        self.labels_view = None
+        self.cursor_position = None
+        self.world_picker = vtkWorldPointPicker()
 
         # Central Widget Layout
         self.widget_central = QWidget()
@@ -43,7 +106,38 @@ class MainWindow(QMainWindow):
         # PyVista render window
         self.plotter = QtInteractor(self)
         self.plotter.enable_trackball_style()
-        self.layout_central.addWidget(self.plotter)
+        self.plotter.add_on_render_callback(lambda plotter: self.schedule_labels_update(), render_event=True)
+        self.plotter.iren.add_observer("MouseMoveEvent", self.on_mouse_move)
+        self.plotter.renderer.AddObserver("StartEvent", self.on_render_start)
+        self.layout_viewer = QVBoxLayout()
+        self.layout_viewer.addWidget(self.plotter)
+        self.layout_central.addLayout(self.layout_viewer)
+
+        # Heat-source animation controls
+        self.layout_animation = QHBoxLayout()
+        self.button_prepare_animation = QPushButton("Prepare Heat Source Animation")
+        self.button_prepare_animation.clicked.connect(self.prepare_animation)
+        self.layout_animation.addWidget(self.button_prepare_animation)
+
+        self.button_play = QPushButton("Play")
+        self.button_play.setCheckable(True)
+        self.button_play.setEnabled(False)
+        self.button_play.clicked.connect(self.toggle_animation)
+        self.layout_animation.addWidget(self.button_play)
+
+        self.slider_step = QSlider(Qt.Horizontal)
+        self.slider_step.setEnabled(False)
+        self.slider_step.valueChanged.connect(self.show_frame)
+        self.layout_animation.addWidget(self.slider_step)
+
+        self.label_step = QLabel("Step: -")
+        self.layout_animation.addWidget(self.label_step)
+
+        self.button_export_frames = QPushButton("Export Frames")
+        self.button_export_frames.setEnabled(False)
+        self.button_export_frames.clicked.connect(self.export_animation_frames)
+        self.layout_animation.addWidget(self.button_export_frames)
+        self.layout_viewer.addLayout(self.layout_animation)
 
         # Editor Panel
         self.widget_editor = QWidget()
@@ -68,9 +162,10 @@ class MainWindow(QMainWindow):
         self.layout_editor.addWidget(self.button_reset)
 
         # Table to show coordinates
-        self.table_points = QTableWidget(0, 3)
-        self.table_points.setHorizontalHeaderLabels(["X", "Y", "Z"])
-        self.table_points.cellChanged.connect(self.update_point_from_table)
+        self.points_model = te.PointsTableModel(self)
+        self.points_model.dataChanged.connect(self.update_point_from_table)
+        self.table_points = QTableView()
+        self.table_points.setModel(self.points_model)
         self.table_points.setMinimumWidth(300)
         self.table_points.setMaximumWidth(300)
         self.table_points.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -100,6 +195,60 @@ class MainWindow(QMainWindow):
         self.spinbox_cooling_duration.setMinimum(0)
         self.layout_editor.addWidget(self.spinbox_cooling_duration)
 
+        self.label_cooling_growth_title = QLabel(f"Cooling Step Growth / Max Step (1 = 1 s Steps):")
+        self.layout_editor.addWidget(self.label_cooling_growth_title)
+
+        self.layout_cooling_steps = QHBoxLayout()
+        self.spinbox_cooling_growth = QDoubleSpinBox()
+        self.spinbox_cooling_growth.setMinimum(1.0)
+        self.spinbox_cooling_growth.setMaximum(10.0)
+        self.spinbox_cooling_growth.setSingleStep(0.1)
+        self.spinbox_cooling_growth.setValue(1.0)
+        self.layout_cooling_steps.addWidget(self.spinbox_cooling_growth)
+
+        self.spinbox_cooling_max_step = QSpinBox()
+        self.spinbox_cooling_max_step.setMinimum(1)
+        self.spinbox_cooling_max_step.setMaximum(100000)
+        self.spinbox_cooling_max_step.setValue(600)
+        self.layout_cooling_steps.addWidget(self.spinbox_cooling_max_step)
+        self.layout_editor.addLayout(self.layout_cooling_steps)
+
+        self.input_cooling_times = QLineEdit()
+        self.input_cooling_times.setPlaceholderText("Custom cooling step times, e.g. 1,5,30,120")
+        self.layout_editor.addWidget(self.input_cooling_times)
+
+        self.label_load_mode_title = QLabel(f"Heat Load Application:")
+        self.layout_editor.addWidget(self.label_load_mode_title)
+
+        self.combo_load_mode = QComboBox()
+        self.combo_load_mode.addItem("Per Element Loop (compatible)", "element")
+        self.combo_load_mode.addItem("Vectorized Arrays", "vector")
+        self.combo_load_mode.addItem("Precomputed From Centroids", "precomputed")
+        self.layout_editor.addWidget(self.combo_load_mode)
+
+        self.label_cull_radii_title = QLabel(f"Heat Zone Padding (Radii, 0 = Whole Model):")
+        self.layout_editor.addWidget(self.label_cull_radii_title)
+
+        self.spinbox_cull_radii = QDoubleSpinBox()
+        self.spinbox_cull_radii.setMinimum(0.0)
+        self.spinbox_cull_radii.setMaximum(100.0)
+        self.spinbox_cull_radii.setSingleStep(0.5)
+        self.spinbox_cull_radii.setValue(0.0)
+        self.layout_editor.addWidget(self.spinbox_cull_radii)
+
+        self.label_max_travel_title = QLabel(f"Max Travel per Step (x C Front, 0 = 1 s Steps):")
+        self.layout_editor.addWidget(self.label_max_travel_title)
+
+        self.spinbox_max_travel = QDoubleSpinBox()
+        self.spinbox_max_travel.setMinimum(0.0)
+        self.spinbox_max_travel.setMaximum(100.0)
+        self.spinbox_max_travel.setSingleStep(0.1)
+        self.spinbox_max_travel.setValue(0.0)
+        self.layout_editor.addWidget(self.spinbox_max_travel)
+
+        self.checkbox_compact = QCheckBox("Compact Output (Step Table File)")
+        self.layout_editor.addWidget(self.checkbox_compact)
+
         self.table_parameters = QTableWidget(9, 1)
         self.table_parameters.setVerticalHeaderLabels([
             "Heat Central",
@@ -127,8 +276,59 @@ class MainWindow(QMainWindow):
         self.table_parameters.setItem(6, 0, QTableWidgetItem("1.33"))
         self.table_parameters.setItem(7, 0, QTableWidgetItem("2.0e8"))
         self.table_parameters.setItem(8, 0, QTableWidgetItem("22.0"))
+        self.table_parameters.itemChanged.connect(self.schedule_temperature_update)
         self.layout_editor.addWidget(self.table_parameters)
 
+        self.checkbox_temperature = QCheckBox("Temperature Preview at Time (s):")
+        self.checkbox_temperature.toggled.connect(self.schedule_temperature_update)
+        self.layout_editor.addWidget(self.checkbox_temperature)
+
+        self.spinbox_temperature_time = QDoubleSpinBox()
+        self.spinbox_temperature_time.setMinimum(0.0)
+        self.spinbox_temperature_time.setMaximum(1000000.0)
+        self.spinbox_temperature_time.setValue(2.0)
+        self.spinbox_temperature_time.valueChanged.connect(self.schedule_temperature_update)
+        self.layout_editor.addWidget(self.spinbox_temperature_time)
+
+        self.table_material = QTableWidget(3, 1)
+        self.table_material.setVerticalHeaderLabels([
+            "Density",
+            "Specific Heat",
+            "Conductivity"])
+        self.table_material.setHorizontalHeaderLabels(["Value"])
+        self.table_material.setMinimumWidth(300)
+        self.table_material.setMaximumWidth(300)
+        self.table_material.setMaximumHeight(120)
+        self.table_material.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.table_material.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        for i, value in enumerate(thermal.DEFAULT_MATERIAL):
+            self.table_material.setItem(i, 0, QTableWidgetItem(f"{value:g}"))
+        self.table_material.itemChanged.connect(self.schedule_temperature_update)
+        self.layout_editor.addWidget(self.table_material)
+
+        self.label_passes_title = QLabel(f"Weld Passes (Start Time, Current Path and Parameters):")
+        self.layout_editor.addWidget(self.label_passes_title)
+
+        self.layout_passes = QHBoxLayout()
+        self.spinbox_pass_start = QSpinBox()
+        self.spinbox_pass_start.setMaximum(100000)
+        self.layout_passes.addWidget(self.spinbox_pass_start)
+
+        self.button_add_pass = QPushButton("Add Pass")
+        self.button_add_pass.clicked.connect(self.add_weld_pass)
+        self.layout_passes.addWidget(self.button_add_pass)
+
+        self.button_remove_pass = QPushButton("Remove Pass")
+        self.button_remove_pass.clicked.connect(self.remove_weld_pass)
+        self.layout_passes.addWidget(self.button_remove_pass)
+        self.layout_editor.addLayout(self.layout_passes)
+
+        self.list_passes = QListWidget()
+        self.list_passes.setMinimumWidth(300)
+        self.list_passes.setMaximumWidth(300)
+        self.list_passes.setMaximumHeight(80)
+        self.layout_editor.addWidget(self.list_passes)
+
         # Line edit + button for adding by ID
         self.input_ids = QLineEdit()
         self.input_ids.setPlaceholderText("Enter point IDs, e.g. 0,5,12")
@@ -139,6 +339,16 @@ class MainWindow(QMainWindow):
         self.button_add_ids.clicked.connect(self.add_points_by_id)
         self.layout_editor.addWidget(self.button_add_ids)
 
+        self.button_snap_points = QPushButton("Snap Points to Mesh Nodes")
+        self.button_snap_points.setMinimumWidth(300)
+        self.button_snap_points.clicked.connect(self.snap_points_to_mesh)
+        self.layout_editor.addWidget(self.button_snap_points)
+
+        self.button_fill_seam = QPushButton("Fill Seam Along Surface")
+        self.button_fill_seam.setMinimumWidth(300)
+        self.button_fill_seam.clicked.connect(self.fill_seam)
+        self.layout_editor.addWidget(self.button_fill_seam)
+
         # Button to list all mesh points
         self.button_list_points = QPushButton("Show All Mesh Points")
         self.button_list_points.setMinimumWidth(300)
@@ -152,6 +362,31 @@ class MainWindow(QMainWindow):
         self.button_toggle_labels.clicked.connect(self.toggle_labels)
         self.layout_editor.addWidget(self.button_toggle_labels)
 
+        self.label_labels_title = QLabel(f"Labels: Nodes / Max Count / Cursor Radius:")
+        self.layout_editor.addWidget(self.label_labels_title)
+
+        self.layout_labels = QHBoxLayout()
+        self.combo_label_mode = QComboBox()
+        self.combo_label_mode.addItem("In View", "view")
+        self.combo_label_mode.addItem("Near Cursor", "cursor")
+        self.combo_label_mode.currentIndexChanged.connect(self.schedule_labels_update)
+        self.layout_labels.addWidget(self.combo_label_mode)
+
+        self.spinbox_label_count = QSpinBox()
+        self.spinbox_label_count.setMinimum(1)
+        self.spinbox_label_count.setMaximum(10000)
+        self.spinbox_label_count.setValue(200)
+        self.spinbox_label_count.valueChanged.connect(self.schedule_labels_update)
+        self.layout_labels.addWidget(self.spinbox_label_count)
+
+        self.spinbox_label_radius = QDoubleSpinBox()
+        self.spinbox_label_radius.setMinimum(0.1)
+        self.spinbox_label_radius.setMaximum(100000.0)
+        self.spinbox_label_radius.setValue(10.0)
+        self.spinbox_label_radius.valueChanged.connect(self.schedule_labels_update)
+        self.layout_labels.addWidget(self.spinbox_label_radius)
+        self.layout_editor.addLayout(self.layout_labels)
+
         # Will hold the labels actor so we can remove it later
         self.labels_actor = None
 
@@ -174,12 +409,28 @@ class MainWindow(QMainWindow):
         self.export_csv_action.triggered.connect(self.export_csv)
         self.menu.addAction(self.export_csv_action)
 
+        self.import_centroids_action = QAction("Import Element Centroids", self)
+        self.import_centroids_action.triggered.connect(self.import_element_centroids)
+        self.menu.addAction(self.import_centroids_action)
+
         self.export_action = QAction("Export APDL", self)
         self.export_action.triggered.connect(self.export_apdl)
         self.menu.addAction(self.export_action)
 
+        self.export_sweep_action = QAction("Export Parameter Sweep", self)
+        self.export_sweep_action.triggered.connect(self.export_sweep)
+        self.menu.addAction(self.export_sweep_action)
+
+        self.export_passes_action = QAction("Export Multi-Pass APDL", self)
+        self.export_passes_action.triggered.connect(self.export_multi_pass)
+        self.menu.addAction(self.export_passes_action)
+
+        self.export_trajectory_action = QAction("Export Trajectory (NPY / HDF5)", self)
+        self.export_trajectory_action.triggered.connect(self.export_trajectory)
+        self.menu.addAction(self.export_trajectory_action)
+
     def toggle_labels(self):
-        """Show or hide labels for every mesh point (ID: X,Y,Z)."""
+        """Show or hide the ID labels of the mesh nodes in view or around the cursor."""
         if self.mesh is None:
             QMessageBox.warning(self, "No mesh loaded", "Please import an STL first.")
             # un-check the toggle
@@ -187,39 +438,89 @@ class MainWindow(QMainWindow):
             return
 
         if self.button_toggle_labels.isChecked():
-            # Build a list of "ID: x,y,z" strings
-            coords = self.mesh.points
-            labels = [
-                # f"{i}: {pt[0]:.3f}, {pt[1]:.3f}, {pt[2]:.3f}"
-                f"{i}"
-                for i, pt in enumerate(coords)
-            ]
-            # Add the labels actor
-            self.labels_actor = self.plotter.add_point_labels(
-                self.mesh,  # the mesh to pull points from
-                labels,  # labels list, one per point
-                point_size=0,  # hide the little glyphs
-                font_size=10,
-                shape_opacity=0  # fully transparent background
-            )
             self.button_toggle_labels.setText("Hide Mesh Labels")
+            self.labels_view = None
+            self.update_labels()
         else:
-            # Remove the labels actor
-            if self.labels_actor is not None:
-                self.plotter.remove_actor(self.labels_actor)
-                self.labels_actor = None
+            self.remove_labels()
             self.button_toggle_labels.setText("Show Mesh Labels")
+            self.plotter.render()
+
+    def remove_labels(self):
+        if self.labels_actor is not None:
+            self.plotter.remove_actor(self.labels_actor)
+            self.labels_actor = None
+        self.labels_view = None
+
+    def schedule_labels_update(self, *args):
+        if self.button_toggle_labels.isChecked():
+            self.labels_update_timer.start()
+
+    def on_render_start(self, renderer, event):
+        """Draw the display proxy instead of the full mesh while the view is being moved."""
+        if self.proxy_actor is None:
+            return
+        # the interactor raises the desired update rate of the render window during interaction
+        moving = (self.plotter.ren_win.GetDesiredUpdateRate()
+                  > self.plotter.iren.interactor.GetStillUpdateRate())
+        self.mesh_actor.SetVisibility(not moving)
+        self.proxy_actor.SetVisibility(moving)
+
+    def on_mouse_move(self, interactor, event):
+        if self.combo_label_mode.currentData() == "cursor":
+            self.cursor_position = interactor.GetEventPosition()
+            self.schedule_labels_update()
+
+    def label_ids(self) -> np.ndarray:
+        """IDs of the nodes to label, chosen by the spatial index for the current view."""
+        count = self.spinbox_label_count.value()
+        if self.combo_label_mode.currentData() == "cursor":
+            if self.cursor_position is None:
+                return np.empty(0, dtype=int)
+            self.world_picker.Pick(*self.cursor_position, 0, self.plotter.renderer)
+            return self.mesh_index.nearest(self.world_picker.GetPickPosition(), count,
+                                           self.spinbox_label_radius.value())
+
+        camera = self.plotter.camera
+        planes = [0.0] * 24
+        camera.GetFrustumPlanes(self.plotter.renderer.GetTiledAspectRatio(), planes)
+        return self.mesh_index.visible(camera.GetFocalPoint(), planes, count)
+
+    def update_labels(self):
+        """Relabel after the camera, the cursor or the label settings changed."""
+        if self.mesh is None or not self.button_toggle_labels.isChecked():
+            return
 
+        camera = self.plotter.camera
+        view = (camera.GetPosition(), camera.GetFocalPoint(), camera.GetViewUp(), camera.GetViewAngle(),
+                camera.GetParallelScale(), tuple(self.plotter.window_size), self.cursor_position,
+                self.combo_label_mode.currentData(), self.spinbox_label_count.value(),
+                self.spinbox_label_radius.value())
+        # Rendering the labels triggers another render callback; skip it if nothing moved
+        if view == self.labels_view:
+            return
+        self.labels_view = view
+
+        ids = self.label_ids()
+        if self.labels_actor is not None:
+            self.plotter.remove_actor(self.labels_actor, render=False)
+            self.labels_actor = None
+        if len(ids):
+            self.labels_actor = self.plotter.add_point_labels(
+                self.mesh.points[ids],
+                [f"{i}" for i in ids],
+                point_size=0,  # hide the little glyphs
+                font_size=10,
+                shape_opacity=0,  # fully transparent background
+                render=False
+            )
         self.plotter.render()
 
     def reset_tables(self):
-        # remove all point actors from the plotter
-        for actor in self.point_actors.values():
-            self.plotter.remove_actor(actor)
-        self.point_actors.clear()
-
-        # clear the list of selected point IDs
+        # clear the list of selected point IDs and their markers
         self.selected_ids.clear()
+        self.selected_rows = np.empty(0, dtype=int)
+        self.show_selected_points()
 
         # remove spline if it exists
         if self.spline_actor:
@@ -227,7 +528,7 @@ class MainWindow(QMainWindow):
             self.spline_actor = None
 
         # delete all rows in the points table (headers stay)
-        self.table_points.setRowCount(0)
+        self.points_model.clear()
 
         # reset welding length and update label
         self.welding_length = 0.0
@@ -258,29 +559,325 @@ class MainWindow(QMainWindow):
         if filename:
             self.load_stl(filename)
 
+    def import_element_centroids(self):
+        """Load an element ID, X, Y, Z export used by the precomputed load mode."""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Element Centroids", "", "Centroid files (*.csv *.txt)"
+        )
+        if not path:
+            return
+
+        try:
+            self.element_centroids = cw.read_element_centroids(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not read element centroids:\n{e}")
+            return
+
+        n = len(self.element_centroids[0])
+        QMessageBox.information(self, "Imported", f"Loaded {n} element centroids from:\n{path}")
+
+    def cooling_step_times(self):
+        """Cooling step times from the custom list or the growth factor, None for 1 s steps."""
+        if self.input_cooling_times.text().strip():
+            return sc.parse_step_times(self.input_cooling_times.text())
+        if self.spinbox_cooling_growth.value() > 1.0:
+            return sc.cooling_step_times(self.spinbox_cooling_duration.value(),
+                                         growth=self.spinbox_cooling_growth.value(),
+                                         max_step=self.spinbox_cooling_max_step.value())
+        return None
+
+    def export_options(self):
+        """Writer options of the editor panel, or None after warning about invalid ones."""
+        mode = self.combo_load_mode.currentData()
+        if mode == "precomputed" and self.element_centroids is None:
+            QMessageBox.warning(self, "No element centroids", "Please import the element centroids first.")
+            return None
+        if mode == "precomputed" and self.checkbox_compact.isChecked():
+            QMessageBox.warning(self, "Invalid options", "Compact output is not available for precomputed loads.")
+            return None
+
+        try:
+            cooling_times = self.cooling_step_times()
+        except ValueError:
+            QMessageBox.critical(self, "Invalid input", "Cooling step times must be positive, increasing numbers.")
+            return None
+
+        return dict(mode=mode,
+                    element_centroids=self.element_centroids,
+                    cull_radii=self.spinbox_cull_radii.value() or None,
+                    max_travel_fraction=self.spinbox_max_travel.value() or None,
+                    cooling_times=cooling_times,
+                    compact=self.checkbox_compact.isChecked())
+
     def export_apdl(self):
+        options = self.export_options()
+        if options is None:
+            return
+
         filename, _ = QFileDialog.getSaveFileName(self, "Save APDL", "", "APDL files (*.txt)")
         if filename:
-            points = te.table_to_numpy(self.table_points)
+            points = self.points_model.points.copy()
+            values = te.table_to_numpy(self.table_parameters).flatten()
+
+            self.start_export(Worker(cw.write_apdl_commands,
+                                     filename,
+                                     points,
+                                     values,
+                                     self.spinbox_welding_duration.value(),
+                                     self.spinbox_cooling_duration.value(),
+                                     **options),
+                              "Writing APDL script...",
+                              f"Saved APDL script to:\n{filename}")
+
+    def export_sweep(self):
+        """Write one APDL script per combination of swept Goldak parameters."""
+        options = self.export_options()
+        if options is None:
+            return
+
+        labels = [self.table_parameters.verticalHeaderItem(i).text()
+                  for i in range(self.table_parameters.rowCount())]
+        dialog = SweepDialog(self, labels, cw.GOLDAK_PARAMETER_NAMES)
+        if not dialog.exec():
+            return
+        if not dialog.output_dir() or not dialog.ranges():
+            QMessageBox.warning(self, "Invalid input", "Please choose an output directory and at least one swept value.")
+            return
+
+        points = self.points_model.points.copy()
+        values = te.table_to_numpy(self.table_parameters).flatten()
+        try:
+            n = len(sw.parameter_grid(values, dialog.ranges()))
+        except ValueError as e:
+            QMessageBox.critical(self, "Invalid input", f"Could not read the swept values:\n{e}")
+            return
+
+        self.start_export(Worker(sw.run_sweep,
+                                 dialog.output_dir(),
+                                 points,
+                                 values,
+                                 dialog.ranges(),
+                                 self.spinbox_welding_duration.value(),
+                                 self.spinbox_cooling_duration.value(),
+                                 **options),
+                          f"Writing {n} APDL scripts...",
+                          f"Saved {n} APDL scripts and manifest.csv to:\n{dialog.output_dir()}")
+
+    def add_weld_pass(self):
+        """Store the current path and Goldak parameters as a pass starting at the chosen time."""
+        pts = self.points_model.points
+        if pts.shape[0] < 2:
+            QMessageBox.warning(self, "No path", "Please define at least two path points.")
+            return
+        try:
             values = te.table_to_numpy(self.table_parameters).flatten()
+            start = self.spinbox_pass_start.value()
+            weld_pass = cw.WeldPass(pts, values, start, start + self.spinbox_welding_duration.value())
+            cw.check_passes(self.weld_passes + [weld_pass])
+        except ValueError as e:
+            QMessageBox.critical(self, "Invalid input", str(e))
+            return
+
+        self.weld_passes.append(weld_pass)
+        self.list_passes.addItem(f"Pass {len(self.weld_passes)}: {pts.shape[0]} points, "
+                                 f"{weld_pass.start_time}-{weld_pass.end_time} s, Q={values[0]:g}")
+
+    def remove_weld_pass(self):
+        row = self.list_passes.currentRow()
+        if row < 0:
+            return
+        del self.weld_passes[row]
+        self.list_passes.takeItem(row)
+
+    def export_multi_pass(self):
+        """Write one script in which all stored passes weld at their own times."""
+        if not self.weld_passes:
+            QMessageBox.information(self, "No passes", "Please add the weld passes first.")
+            return
+        options = self.export_options()
+        if options is None:
+            return
+        if options["mode"] == "vector":
+            QMessageBox.warning(self, "Invalid options",
+                                "Multi-pass scripts use the per element loop or precomputed loads.")
+            return
+        ignored = [name for name, key in (("Heat Zone Padding", "cull_radii"),
+                                          ("Max Travel per Step", "max_travel_fraction"),
+                                          ("Compact Output", "compact"))
+                   if options[key]]
+        if ignored:
+            QMessageBox.warning(self, "Invalid options",
+                                "Multi-pass scripts use 1 s load steps over all elements. "
+                                f"Please turn off: {', '.join(ignored)}.")
+            return
 
-            cw.write_apdl_commands(filename,
-                                   points,
-                                   values,
-                                   self.spinbox_welding_duration.value(),
-                                   self.spinbox_cooling_duration.value())
+        filename, _ = QFileDialog.getSaveFileName(self, "Save APDL", "", "APDL files (*.txt)")
+        if filename:
+            self.start_export(Worker(cw.write_multi_pass_commands,
+                                     filename,
+                                     list(self.weld_passes),
+                                     self.spinbox_cooling_duration.value(),
+                                     mode=options["mode"],
+                                     element_centroids=options["element_centroids"],
+                                     cooling_times=options["cooling_times"]),
+                              f"Writing APDL script of {len(self.weld_passes)} passes...",
+                              f"Saved APDL script to:\n{filename}")
+
+    def export_trajectory(self):
+        """Save the sampled source trajectory, and optionally the flux at the element centroids, as binary arrays."""
+        points = self.points_model.points.copy()
+        if points.shape[0] < 2:
+            QMessageBox.warning(self, "No path", "Please define at least two path points.")
+            return
+
+        filename, selected = QFileDialog.getSaveFileName(self, "Export Trajectory", "",
+                                                         "NumPy arrays directory (*);;HDF5 files (*.h5)")
+        if not filename:
+            return
+        fmt = "npy"
+        if selected.startswith("HDF5") or os.path.splitext(filename)[1].lower() in be.HDF5_EXTENSIONS:
+            fmt = "hdf5"
+            if not os.path.splitext(filename)[1]:
+                filename += ".h5"
+
+        element_centroids = None
+        if self.element_centroids is not None and QMessageBox.question(
+                self, "Flux fields", "Also export the flux of every step at the imported element centroids?"
+        ) == QMessageBox.Yes:
+            element_centroids = self.element_centroids
+
+        values = te.table_to_numpy(self.table_parameters).flatten()
+        self.start_export(Worker(be.export_trajectory,
+                                 filename,
+                                 points,
+                                 values,
+                                 self.spinbox_welding_duration.value(),
+                                 fmt=fmt,
+                                 max_travel_fraction=self.spinbox_max_travel.value() or None,
+                                 element_centroids=element_centroids),
+                          "Writing trajectory...",
+                          f"Saved trajectory to:\n{filename}")
+
+    def start_export(self, worker, label, message):
+        """Run an export worker with a cancellable progress dialog."""
+        self.export_worker = worker
+
+        self.export_progress = QProgressDialog(label, "Cancel", 0, 0, self)
+        self.export_progress.setWindowTitle("Export APDL")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.canceled.connect(worker.cancel)
+
+        worker.signals.progress.connect(self.on_export_progress)
+        worker.signals.finished.connect(lambda _: self.on_export_done(message))
+        worker.signals.cancelled.connect(lambda: self.on_export_done(None))
+        worker.signals.failed.connect(
+            lambda error: self.on_export_done(None, f"Could not export APDL:\n{error}"))
+        self.export_action.setEnabled(False)
+        self.export_sweep_action.setEnabled(False)
+        self.export_passes_action.setEnabled(False)
+        self.export_trajectory_action.setEnabled(False)
+        QThreadPool.globalInstance().start(worker)
+
+    def on_export_progress(self, done, total):
+        if self.export_progress is not None:
+            self.export_progress.setMaximum(total)
+            self.export_progress.setValue(done)
+
+    def on_export_done(self, message=None, error=None):
+        """Close the progress dialog of a finished, cancelled or failed export."""
+        if self.export_progress is not None:
+            self.export_progress.close()
+            self.export_progress = None
+        self.export_worker = None
+        self.export_action.setEnabled(True)
+        self.export_sweep_action.setEnabled(True)
+        self.export_passes_action.setEnabled(True)
+        self.export_trajectory_action.setEnabled(True)
+
+        if error:
+            QMessageBox.critical(self, "Error", error)
+        elif message:
+            QMessageBox.information(self, "Exported", message)
+
+    @staticmethod
+    def read_mesh(filename, progress=None):
+        """
+        Read (or fetch from the mesh cache) an STL in millimetres, index its nodes, build
+        its edge graph and its display proxy.
+        """
+        mesh = mesh_cache.load_mesh(filename, progress=progress)
+        surface = mesh if mesh.is_all_triangles else mesh.triangulate()
+        surface_graph = spatial.SurfaceGraph(mesh.points, surface.faces.reshape(-1, 4)[:, 1:])
+        return mesh, spatial.MeshIndex(mesh.points), mesh_cache.load_proxy(filename, mesh), surface_graph
 
     def load_stl(self, filename):
-        self.plotter.clear()
-        self.mesh = pv.read(filename)
+        """Read the STL on a worker thread; the GUI stays responsive meanwhile."""
+        if self.load_worker is not None:
+            return
 
-        self.mesh.points *= 1000
-        self.plotter.add_mesh(
+        worker = Worker(self.read_mesh, filename)
+        self.load_worker = worker
+
+        self.load_progress = QProgressDialog("Loading STL...", None, 0, 0, self)
+        self.load_progress.setWindowTitle("Import STL")
+        self.load_progress.setWindowModality(Qt.WindowModal)
+        self.load_progress.setMinimumDuration(0)
+
+        worker.signals.progress.connect(self.on_load_progress)
+        worker.signals.finished.connect(self.on_load_done)
+        worker.signals.failed.connect(self.on_load_failed)
+        self.import_action.setEnabled(False)
+        QThreadPool.globalInstance().start(worker)
+
+    def on_load_progress(self, done, total):
+        if self.load_progress is not None:
+            self.load_progress.setMaximum(total)
+            self.load_progress.setValue(done)
+
+    def finish_load(self):
+        if self.load_progress is not None:
+            self.load_progress.close()
+            self.load_progress = None
+        self.load_worker = None
+        self.import_action.setEnabled(True)
+
+    def on_load_failed(self, error):
+        self.finish_load()
+        QMessageBox.critical(self, "Error", f"Could not load STL:\n{error}")
+
+    def on_load_done(self, result):
+        self.finish_load()
+        self.show_mesh(*result)
+
+    def show_mesh(self, mesh, mesh_index, proxy=None, surface_graph=None):
+        self.stop_animation()
+        if self.temperature_worker is not None:
+            self.temperature_worker.cancel()
+            self.temperature_worker = None
+        self.plotter.clear()
+        self.labels_actor = None
+        self.labels_view = None
+        self.mesh = mesh
+        self.mesh_index = mesh_index
+        self.surface_graph = surface_graph
+        self.mesh_actor = self.plotter.add_mesh(
             self.mesh,
             color="lightgray",
             opacity=0.5,
             show_edges=True
         )
+        self.proxy_actor = None
+        if proxy is not None:
+            # only drawn while rotating; picking always resolves against the full mesh
+            self.proxy_actor = self.plotter.add_mesh(
+                proxy,
+                color="lightgray",
+                opacity=0.5,
+                pickable=False,
+                reset_camera=False
+            )
+            self.proxy_actor.SetVisibility(False)
         self.plotter.reset_camera()
         self.plotter.show_axes()
 
@@ -290,8 +887,10 @@ class MainWindow(QMainWindow):
             show_zaxis=True, )
 
         self.selected_ids.clear()
-        self.point_actors.clear()
-        self.table_points.setRowCount(0)
+        self.selected_rows = np.empty(0, dtype=int)
+        self.selected_points = None
+        self.selected_actor = None
+        self.points_model.clear()
         if self.spline_actor:
             self.plotter.remove_actor(self.spline_actor)
             self.spline_actor = None
@@ -301,38 +900,61 @@ class MainWindow(QMainWindow):
             return
 
         picked_point = picker
-        point_id = self.mesh.find_closest_point(picked_point, n=1)
-
-        if point_id not in self.selected_ids:
-            self.selected_ids.append(point_id)
-            coords = self.mesh.points[point_id]
-            actor = self.plotter.add_points(
-                coords,
+        point_id = self.mesh_index.closest(picked_point)
+
+        if self.selected_ids.add(point_id):
+            self.append_selected_points([point_id])
+
+        self.schedule_spline_update()
+
+    def append_selected_points(self, ids):
+        """Append the newly selected mesh nodes `ids` to the table and mark them."""
+        start = self.points_model.rowCount()
+        self.points_model.append_points(self.mesh.points[ids])
+        self.selected_rows = np.concatenate((self.selected_rows, np.arange(start, self.points_model.rowCount())))
+        self.show_selected_points()
+
+    def set_selected_points(self):
+        """Replace the table by the selected mesh nodes, in order."""
+        self.points_model.set_points(self.mesh.points[self.selected_ids.array()])
+        self.selected_rows = np.arange(len(self.selected_ids))
+        self.show_selected_points()
+
+    def show_selected_points(self):
+        """Point the selection actor at the table rows picked from the mesh."""
+        # rows imported from CSV have no mesh point and are not marked
+        pts = self.points_model.points[self.selected_rows]
+        if self.selected_actor is None:
+            if not len(pts):
+                return
+            self.selected_points = pv.PolyData(pts.copy())
+            self.selected_actor = self.plotter.add_points(
+                self.selected_points,
                 render_points_as_spheres=True,
                 point_size=10,
-                color="blue"
+                color="blue",
+                reset_camera=False
             )
+        else:
+            self.selected_points.copy_from(pv.PolyData(pts.copy()))
 
-            self.point_actors[point_id] = actor
-
-            row = self.table_points.rowCount()
-            self.table_points.insertRow(row)
-            for i, val in enumerate(coords):
-                item = QTableWidgetItem(f"{val:.3f}")
-                item.setTextAlignment(Qt.AlignCenter)
-                self.table_points.setItem(row, i, item)
-
-        self.update_spline()
+    def schedule_spline_update(self):
+        """Rebuild the spline once, after the current batch of edits has been processed."""
+        self.spline_update_timer.start()
 
     def update_spline(self):
+        self.spline_update_timer.stop()
+
         if self.spline_actor:
             self.plotter.remove_actor(self.spline_actor)
 
-        pts = te.table_to_numpy(self.table_points)
+        pts = self.points_model.points
 
         if pts.shape[0] >= 2:
-            self.welding_length = sp.calculate_position_and_directions(pts, 2)[0]
+            self.welding_length = tr.default_cache.get(pts, previous=self.path_points).length
+            self.path_points = pts.copy()
             self.label_welding_length_title.setText(f"Welding Length: {self.welding_length:.3f}")
+            self.schedule_temperature_update()
             # Draw spline
             spline = pv.Spline(pts, n_points=100)
             self.spline_actor = self.plotter.add_mesh(
@@ -343,24 +965,12 @@ class MainWindow(QMainWindow):
 
         self.plotter.render()
 
-    def update_point_from_table(self, row, col):
-        try:
-            x = float(self.table_points.item(row, 0).text())
-            y = float(self.table_points.item(row, 1).text())
-            z = float(self.table_points.item(row, 2).text())
-            point_id = self.selected_ids[row]
-
-            self.plotter.remove_actor(self.point_actors[point_id])
-            self.point_actors[point_id] = self.plotter.add_points(
-                np.array([x, y, z]),
-                render_points_as_spheres=True,
-                point_size=10,
-                color="blue"
-            )
-            self.update_spline()
-
-        except Exception as e:
-            print("Error updating point:", e)
+    def update_point_from_table(self, top_left, bottom_right, roles=()):
+        # rows imported from CSV have no mesh point or marker
+        markers = np.flatnonzero((self.selected_rows >= top_left.row()) & (self.selected_rows <= bottom_right.row()))
+        if self.selected_points is not None and len(markers):
+            self.selected_points.points[markers] = self.points_model.points[self.selected_rows[markers]]
+        self.schedule_spline_update()
 
     def add_points_by_id(self):
         """Parse IDs from the line edit and add them as picked points."""
@@ -376,44 +986,63 @@ class MainWindow(QMainWindow):
             return
 
         max_id = self.mesh.n_points - 1
-        added = 0
-        for point_id in ids:
-            if point_id < 0 or point_id > max_id:
-                QMessageBox.warning(self,
-                                    "ID out of range",
-                                    f"Point ID {point_id} is out of range (0 to {max_id})."
-                                    )
-                continue
-
-            if point_id in self.selected_ids:
-                # already added
-                continue
-
-            coords = self.mesh.points[point_id]
-            actor = self.plotter.add_points(
-                coords,
-                render_points_as_spheres=True,
-                point_size=10,
-                color="blue"
-            )
-            self.point_actors[point_id] = actor
-            self.selected_ids.append(point_id)
+        ids = np.array(ids, dtype=int)
+        out_of_range = (ids < 0) | (ids > max_id)
+        if out_of_range.any():
+            QMessageBox.warning(self,
+                                "ID out of range",
+                                f"Point IDs {', '.join(map(str, ids[out_of_range]))} are out of range (0 to {max_id})."
+                                )
+
+        # IDs that are already selected are skipped
+        added = self.selected_ids.update(ids[~out_of_range])
+        if len(added):
+            self.append_selected_points(added)
+            self.schedule_spline_update()
+        else:
+            QMessageBox.information(self, "No new points", "No valid new IDs were added.")
 
-            # add to table
-            row = self.table_points.rowCount()
-            self.table_points.insertRow(row)
-            for i, val in enumerate(coords):
-                item = QTableWidgetItem(f"{val:.3f}")
-                item.setTextAlignment(Qt.AlignCenter)
-                self.table_points.setItem(row, i, item)
+    def snap_points_to_mesh(self):
+        """Replace every path point, e.g. imported from CSV, by its nearest mesh node."""
+        if self.mesh is None:
+            QMessageBox.warning(self, "No mesh loaded", "Please import an STL first.")
+            return
+        if self.points_model.rowCount() == 0:
+            QMessageBox.information(self, "No data", "There are no points to snap.")
+            return
+
+        ids, distances = self.mesh_index.snap(self.points_model.points)
+        # points snapping to an already used node are dropped
+        self.selected_ids.clear()
+        self.selected_ids.update(ids)
+        self.set_selected_points()
+        self.schedule_spline_update()
+        QMessageBox.information(self, "Snapped",
+                                f"Snapped {len(ids)} points to {len(self.selected_ids)} mesh nodes "
+                                f"(largest move {distances.max():.3f}).")
+
+    def fill_seam(self):
+        """
+        Replace the picked nodes (start, optional waypoints, end) by the shortest path
+        through them along the mesh edges.
+        """
+        if self.mesh is None:
+            QMessageBox.warning(self, "No mesh loaded", "Please import an STL first.")
+            return
+        if len(self.selected_ids) < 2 or self.points_model.rowCount() != len(self.selected_ids):
+            QMessageBox.information(self, "No seam", "Please pick at least a start and an end node on the mesh.")
+            return
 
-            added += 1
+        try:
+            ids = self.surface_graph.seam(self.selected_ids.array())
+        except ValueError as e:
+            QMessageBox.critical(self, "No seam", str(e))
+            return
 
-        if added:
-            self.update_spline()
-            self.plotter.render()
-        else:
-            QMessageBox.information(self, "No new points", "No valid new IDs were added.")
+        self.selected_ids.clear()
+        self.selected_ids.update(ids)
+        self.set_selected_points()
+        self.schedule_spline_update()
 
     def show_all_points(self):
         """Open a dialog listing every mesh point ID and its coordinates."""
@@ -421,32 +1050,12 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "No mesh loaded", "Please import an STL first.")
             return
 
-        dialog = QDialog(self)
-        dialog.setWindowTitle("All Mesh Points (ID, X, Y, Z)")
-        table = QTableWidget()
-        n = self.mesh.n_points
-        table.setRowCount(n)
-        table.setColumnCount(4)
-        table.setHorizontalHeaderLabels(["ID", "X", "Y", "Z"])
-        table.setMinimumSize(500, 400)
-
-        for i in range(n):
-            coords = self.mesh.points[i]
-            table.setItem(i, 0, QTableWidgetItem(str(i)))
-            for j, v in enumerate(coords, start=1):
-                item = QTableWidgetItem(f"{v:.3f}")
-                item.setTextAlignment(Qt.AlignCenter)
-                table.setItem(i, j, item)
-
-        layout = QVBoxLayout()
-        layout.addWidget(table)
-        dialog.setLayout(layout)
-        dialog.resize(600, 500)
+        dialog = MeshPointsDialog(self, self.mesh.points)
         dialog.exec()
 
     def export_csv(self):
         """Save table_points to a CSV file."""
-        if self.table_points.rowCount() == 0:
+        if self.points_model.rowCount() == 0:
             QMessageBox.information(self, "No data", "There are no points to export.")
             return
 
@@ -457,7 +1066,7 @@ class MainWindow(QMainWindow):
             return
 
         # get numpy array [n_points × 3]
-        arr = te.table_to_numpy(self.table_points)
+        arr = self.points_model.points
         # make a DataFrame with columns X, Y, Z
         df = pd.DataFrame(arr, columns=["X", "Y", "Z"])
         try:
@@ -466,6 +1075,222 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not save CSV:\n{e}")
 
+    def schedule_temperature_update(self, *args):
+        self.temperature_update_timer.start()
+
+    def update_temperature(self):
+        """Evaluate the analytic temperature preview on the mesh nodes in the background."""
+        if self.temperature_worker is not None:
+            self.temperature_worker.cancel()
+            self.temperature_worker = None
+
+        pts = self.points_model.points
+        if not self.checkbox_temperature.isChecked() or self.mesh is None or pts.shape[0] < 2:
+            self.show_temperature(None)
+            return
+        try:
+            values = te.table_to_numpy(self.table_parameters).flatten()
+            material = te.table_to_numpy(self.table_material).flatten()
+        except ValueError:
+            # an incomplete edit, the next one schedules a new update
+            return
+
+        duration = self.spinbox_welding_duration.value()
+        trajectory = tr.default_cache.get(pts)
+        source_times = thermal.source_samples(duration, trajectory.length, values)
+        _, _, positions, directions = trajectory.sample(duration, source_times)
+
+        worker = Worker(thermal.moving_source_temperature,
+                        self.mesh.points,
+                        source_times,
+                        positions,
+                        directions,
+                        values,
+                        material,
+                        self.spinbox_temperature_time.value())
+        worker.signals.finished.connect(lambda result: self.on_temperature_done(worker, result))
+        worker.signals.failed.connect(
+            lambda error: QMessageBox.critical(self, "Error", f"Could not compute the temperature:\n{error}"))
+        self.temperature_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def on_temperature_done(self, worker, temperature):
+        # results of superseded or cancelled evaluations are dropped
+        if worker is self.temperature_worker and temperature is not None:
+            self.temperature_worker = None
+            self.show_temperature(temperature)
+
+    def show_temperature(self, temperature):
+        """Colour the mesh by `temperature`, or back to plain grey for None."""
+        if self.mesh_actor is None:
+            return
+        if temperature is None:
+            self.mesh_actor.mapper.scalar_visibility = False
+        else:
+            self.mesh.point_data["temperature"] = temperature
+            self.mesh_actor.mapper.set_scalars(temperature, "temperature", cmap="jet",
+                                               clim=[temperature.min(), max(temperature.max(), temperature.min() + 1)])
+            self.mesh_actor.mapper.scalar_visibility = True
+        self.plotter.render()
+
+    def prepare_animation(self):
+        """Sample the weld once per second and compute its heat-source frames in the background."""
+        pts = self.points_model.points
+        if pts.shape[0] < 2:
+            QMessageBox.warning(self, "No path", "Please define at least two path points.")
+            return
+        try:
+            values = te.table_to_numpy(self.table_parameters).flatten()
+        except ValueError as e:
+            QMessageBox.critical(self, "Invalid input", f"Could not read the Goldak parameters:\n{e}")
+            return
+
+        self.stop_animation()
+        _, _, positions, directions = tr.default_cache.sample(pts.copy(), self.spinbox_welding_duration.value())
+        self.frames = animation.FrameCache(positions, directions, values, animation.voxel_spacing(values))
+
+        worker = Worker(self.frames.fill)
+        worker.signals.progress.connect(self.on_frame_ready)
+        worker.signals.failed.connect(
+            lambda error: QMessageBox.critical(self, "Error", f"Could not prepare the animation:\n{error}"))
+        self.frames_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+        # the peak flux fixes the colour range of every frame
+        self.animation_clim = [0, goldak.peak_flux(values)]
+        self.animation_cloud = pv.PolyData(positions[:1])
+        self.animation_cloud["flux"] = np.zeros(1)
+        self.animation_actor = self.plotter.add_mesh(
+            self.animation_cloud,
+            scalars="flux",
+            clim=self.animation_clim,
+            cmap="hot",
+            render_points_as_spheres=True,
+            point_size=6,
+            pickable=False,
+            reset_camera=False,
+            show_scalar_bar=False
+        )
+
+        self.slider_step.blockSignals(True)
+        self.slider_step.setRange(0, len(self.frames) - 1)
+        self.slider_step.setValue(0)
+        self.slider_step.blockSignals(False)
+        for widget in (self.slider_step, self.button_play, self.button_export_frames):
+            widget.setEnabled(True)
+        self.show_frame(0)
+
+    def stop_animation(self):
+        """Stop playback and drop the frames, e.g. before the scene is cleared."""
+        self.animation_timer.stop()
+        self.button_play.setChecked(False)
+        self.button_play.setText("Play")
+        if self.frames_worker is not None:
+            self.frames_worker.cancel()
+            self.frames.stop()
+            self.frames_worker = None
+        if self.animation_actor is not None:
+            self.plotter.remove_actor(self.animation_actor, render=False)
+        self.frames = None
+        self.animation_cloud = None
+        self.animation_actor = None
+        for widget in (self.slider_step, self.button_play, self.button_export_frames):
+            widget.setEnabled(False)
+        self.label_step.setText("Step: -")
+
+    def closeEvent(self, event):
+        # the frame worker waits for the playhead until it is stopped
+        self.stop_animation()
+        super().closeEvent(event)
+
+    def set_frame(self, frame):
+        """Write the points and flux of a frame into the animation actor's data set."""
+        points, flux = frame
+        poly = pv.PolyData(points)
+        poly["flux"] = flux
+        self.animation_cloud.copy_from(poly)
+
+    def show_frame(self, step):
+        """Draw `step` if its frame is ready; otherwise on_frame_ready draws it once computed."""
+        if self.frames is None:
+            return
+        self.frames.seek(step)
+        frame = self.frames.peek(step)
+        if frame is None:
+            self.label_step.setText(f"Step: {step + 1}/{len(self.frames)} (computing)")
+            return
+        self.set_frame(frame)
+        self.label_step.setText(f"Step: {step + 1}/{len(self.frames)}")
+        self.plotter.render()
+
+    def on_frame_ready(self, step, total):
+        if self.frames is not None and step == self.slider_step.value():
+            self.show_frame(step)
+
+    def toggle_animation(self, checked):
+        if checked:
+            self.button_play.setText("Pause")
+            self.animation_timer.start()
+        else:
+            self.button_play.setText("Play")
+            self.animation_timer.stop()
+
+    def advance_animation(self):
+        if self.frames is None:
+            return
+        step = (self.slider_step.value() + 1) % len(self.frames)
+        # wait for the worker rather than computing the frame here
+        if self.frames.peek(step) is not None:
+            self.slider_step.setValue(step)
+
+    def export_animation_frames(self):
+        """Render every frame off-screen with the current camera and save it as a PNG sequence."""
+        if self.frames is None:
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Animation Frames Directory")
+        if not directory:
+            return
+
+        self.button_play.setChecked(False)
+        self.toggle_animation(False)
+
+        plotter = pv.Plotter(off_screen=True, window_size=list(self.plotter.window_size))
+        if self.mesh is not None:
+            plotter.add_mesh(self.mesh, color="lightgray", opacity=0.5)
+        plotter.add_mesh(pv.Spline(self.points_model.points, n_points=100), color="red", line_width=5)
+        plotter.add_mesh(self.animation_cloud,
+                         scalars="flux",
+                         clim=self.animation_clim,
+                         cmap="hot",
+                         render_points_as_spheres=True,
+                         point_size=6,
+                         show_scalar_bar=False)
+        plotter.camera_position = self.plotter.camera_position
+
+        progress = QProgressDialog("Saving frames...", "Cancel", 0, len(self.frames), self)
+        progress.setWindowTitle("Export Frames")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        saved = 0
+        try:
+            for step in range(len(self.frames)):
+                if progress.wasCanceled():
+                    break
+                self.set_frame(self.frames.get(step))
+                plotter.screenshot(os.path.join(directory, f"frame_{step:04d}.png"))
+                saved += 1
+                progress.setValue(saved)
+                QApplication.processEvents()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not save the frames:\n{e}")
+            return
+        finally:
+            progress.close()
+            plotter.close()
+            self.show_frame(self.slider_step.value())
+
+        QMessageBox.information(self, "Exported", f"Saved {saved} frames to:\n{directory}")
+
     def import_csv(self):
         """Load X,Y,Z triplets from a CSV into table_points."""
         path, _ = QFileDialog.getOpenFileName(
@@ -485,25 +1310,27 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Invalid format", "CSV must have exactly 3 columns (X,Y,Z).")
             return
 
+        values = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        try:
+            values = te.validate_points(values)
+        except ValueError as e:
+            QMessageBox.critical(self, "Invalid format", f"CSV must contain only numbers:\n{e}")
+            return
+
         # Clear any existing points & actors
         self.reset_tables()
 
-        # Populate table_points
-        n = len(df)
-        self.table_points.setRowCount(n)
-        for i in range(n):
-            for j, col in enumerate(df.columns[:3]):
-                val = df.iloc[i, j]
-                item = QTableWidgetItem(f"{val:.3f}")
-                item.setTextAlignment(Qt.AlignCenter)
-                self.table_points.setItem(i, j, item)
+        # Populate table_points with a single array assignment
+        self.points_model.set_points(values)
+        n = len(values)
 
         # Recompute spline from imported coords
-        self.update_spline()
+        self.schedule_spline_update()
         QMessageBox.information(self, "Imported", f"Loaded {n} points from:\n{path}")
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.resize(1920, 1080)
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import tempfile
+
+import pyvista as pv
+
+# Meshes are cached already scaled to millimetres
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".fergani_kaynak", "mesh_cache")
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+STL_SCALE = 1000.0
+# Triangles of the display proxy drawn while the view is moving
+PROXY_CELLS = 200000
+
+
+def cache_key(filepath: str, scale: float) -> str:
+    """Key of a mesh file: its absolute path, size and modification time, and the unit scale."""
+    stat = os.stat(filepath)
+    text = f"{os.path.abspath(filepath)}|{stat.st_size}|{stat.st_mtime_ns}|{scale!r}"
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def cached_files(cache_dir: str) -> list:
+    """Finished cache entries; files still being written start with a dot."""
+    return [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".vtp") and not entry.name.startswith(".")]
+
+
+def evict(cache_dir: str, max_bytes: int):
+    """Delete the least recently used cached meshes until the cache fits in `max_bytes`."""
+    entries = sorted(cached_files(cache_dir), key=lambda entry: entry.stat().st_mtime)
+    total = sum(entry.stat().st_size for entry in entries)
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        try:
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def read_cached(path: str):
+    """Cached mesh at `path`, or None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        mesh = pv.read(path)
+    except Exception:
+        return None
+    if not mesh.n_points:
+        return None
+    try:
+        # mark as recently used
+        os.utime(path)
+    except OSError:
+        pass
+    return mesh
+
+
+def write_cached(path: str, mesh: pv.PolyData, cache_dir: str, max_bytes: int):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".vtp", dir=cache_dir)
+        os.close(fd)
+        try:
+            mesh.save(temp_path, binary=True)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        evict(cache_dir, max_bytes)
+    except OSError:
+        # the cache is optional, e.g. on a read-only home directory
+        pass
+
+
+def load_mesh(filepath: str,
+              scale: float = STL_SCALE,
+              cache_dir: str = CACHE_DIR,
+              max_bytes: int = MAX_CACHE_BYTES,
+              progress=None) -> pv.PolyData:
+    """
+    Read a mesh file with its points multiplied by `scale`.
+    The scaled mesh is kept as a binary .vtp file in `cache_dir`, so opening the same file
+    again skips parsing it; the least recently used entries are evicted beyond `max_bytes`.
+    `progress(done, total)` is called after each stage.
+    """
+    path = os.path.join(cache_dir, cache_key(filepath, scale) + ".vtp")
+    mesh = read_cached(path)
+    if mesh is not None:
+        if progress is not None:
+            progress(2, 2)
+        return mesh
+
+    if progress is not None:
+        progress(0, 2)
+    mesh = pv.read(filepath)
+    mesh.points *= scale
+    if progress is not None:
+        progress(1, 2)
+
+    write_cached(path, mesh, cache_dir, max_bytes)
+    if progress is not None:
+        progress(2, 2)
+    return mesh
+
+
+def load_proxy(filepath: str,
+               mesh: pv.PolyData,
+               scale: float = STL_SCALE,
+               max_cells: int = PROXY_CELLS,
+               cache_dir: str = CACHE_DIR,
+               max_bytes: int = MAX_CACHE_BYTES):
+    """
+    Decimated copy of `mesh` (read from `filepath`) with about `max_cells` triangles, drawn
+    while the view is rotated; None if the mesh is small enough to draw as it is.
+    Cached next to the mesh itself.
+    """
+    if mesh.n_cells <= max_cells:
+        return None
+
+    path = os.path.join(cache_dir, f"{cache_key(filepath, scale)}-{max_cells}.vtp")
+    proxy = read_cached(path)
+    if proxy is None:
+        proxy = mesh.triangulate().decimate(1.0 - max_cells / mesh.n_cells)
+        write_cached(path, proxy, cache_dir, max_bytes)
+    return proxy
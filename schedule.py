@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def weld_step_times(total_length: float, end_time: float, max_travel: float, max_step: float = None) -> tuple:
+    """
+    Choose the load steps of the welding phase so that the source travels at most
+    `max_travel` between two steps. The source moves at constant speed, so the steps
+    are equally long; `max_step` optionally limits their duration as well.
+    Returns the step end times and the times at which the source positions are sampled.
+    """
+    if not max_travel > 0:
+        raise ValueError(f"The maximum travel per load step must be positive, got {max_travel}")
+    n = int(np.ceil(total_length / max_travel)) + 1
+    if max_step:
+        n = max(n, int(np.ceil(end_time / max_step)))
+    n = max(n, 2)
+
+    step_times = end_time * np.arange(1, n + 1) / n
+    sample_times = np.linspace(0, end_time, n)
+    return step_times, sample_times
+
+
+def cooling_step_times(cooling_duration: float, growth: float = 1.5, first_step: float = 1.0,
+                       max_step: float = None) -> np.ndarray:
+    """
+    Geometrically growing load steps for the cooling phase: the first step lasts `first_step`
+    seconds and every following one `growth` times longer, capped at `max_step`.
+    Returns the step end times measured from the end of welding; the last one is `cooling_duration`.
+    """
+    if not first_step > 0:
+        raise ValueError(f"The first cooling step must be positive, got {first_step}")
+    if not growth >= 1:
+        raise ValueError(f"The cooling step growth must be at least 1, got {growth}")
+    if max_step is not None and max_step < 0:
+        raise ValueError(f"The maximum cooling step must not be negative, got {max_step}")
+    times = []
+    t = 0.0
+    dt = first_step
+    while t < cooling_duration:
+        t = min(t + dt, cooling_duration)
+        times.append(t)
+        dt *= growth
+        if max_step:
+            dt = min(dt, max_step)
+    return np.array(times)
+
+
+def parse_step_times(text: str) -> np.ndarray:
+    """Parse a comma separated list of increasing, positive step times."""
+    times = np.array([float(s) for s in text.split(",") if s.strip() != ''])
+    if times.size == 0 or times[0] <= 0 or np.any(np.diff(times) <= 0):
+        raise ValueError("Step times must be positive and increasing")
+    return times
@@ -0,0 +1,166 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
+
+
+def in_frustum(points: np.ndarray, planes: np.ndarray) -> np.ndarray:
+    """
+    Mask of the points on the inner side of all frustum planes, given as (a, b, c, d) rows
+    with a*x + b*y + c*z + d >= 0 inside (the layout of vtkCamera.GetFrustumPlanes).
+    """
+    planes = np.asarray(planes, dtype=float).reshape(-1, 4)
+    return np.all(points @ planes[:, :3].T + planes[:, 3] >= 0, axis=1)
+
+
+# Share of the mesh nodes beyond which MeshIndex.visible tests all of them at once, which is
+# faster than a sorted query of that many neighbours
+FULL_SCAN_FRACTION = 0.02
+
+
+class MeshIndex:
+    """KD-tree over the mesh nodes, built once per loaded mesh."""
+
+    def __init__(self, points: np.ndarray):
+        self.points = np.asarray(points)
+        self.tree = cKDTree(self.points)
+
+    @property
+    def n_points(self) -> int:
+        return self.points.shape[0]
+
+    def nearest(self, center, count: int, radius: float = np.inf) -> np.ndarray:
+        """IDs of up to `count` nodes within `radius` of `center`, nearest first."""
+        count = min(int(count), self.n_points)
+        if count < 1:
+            return np.empty(0, dtype=int)
+        distances, ids = self.tree.query(center, k=count, distance_upper_bound=radius)
+        return np.atleast_1d(ids)[np.isfinite(np.atleast_1d(distances))]
+
+    def visible(self, center, planes: np.ndarray, count: int) -> np.ndarray:
+        """
+        IDs of up to `count` nodes inside the view frustum, nearest to `center` first.
+        Candidates are drawn from the tree in growing batches, so only the neighbourhood of
+        `center` is tested unless few of its nodes are in view; past FULL_SCAN_FRACTION of the
+        mesh, all nodes are masked at once instead.
+        """
+        count = int(count)
+        if count < 1:
+            return np.empty(0, dtype=int)
+
+        k = count
+        while 4 * k <= FULL_SCAN_FRACTION * self.n_points:
+            k = 4 * k
+            ids = self.nearest(center, k)
+            inside = ids[in_frustum(self.points[ids], planes)]
+            if len(inside) >= count:
+                return inside[:count]
+
+        ids = np.flatnonzero(in_frustum(self.points, planes))
+        offsets = self.points[ids] - np.asarray(center, dtype=float)
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        if len(ids) > count:
+            nearest = np.argpartition(distances, count - 1)[:count]
+            ids, distances = ids[nearest], distances[nearest]
+        return ids[np.argsort(distances)]
+
+    def closest(self, point) -> int:
+        """ID of the node closest to `point`."""
+        return int(self.tree.query(point)[1])
+
+    def snap(self, points: np.ndarray) -> tuple:
+        """IDs of the nodes closest to each of `points` and their distances, in one query."""
+        distances, ids = self.tree.query(np.asarray(points, dtype=float).reshape(-1, 3))
+        return ids, distances
+
+
+class OrderedIdSet:
+    """Node IDs in insertion order with constant-time membership tests."""
+
+    def __init__(self, ids=()):
+        self.ids = dict.fromkeys(int(i) for i in ids)
+
+    def __contains__(self, point_id) -> bool:
+        return int(point_id) in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def add(self, point_id) -> bool:
+        """Add `point_id`; False if it was already present."""
+        point_id = int(point_id)
+        if point_id in self.ids:
+            return False
+        self.ids[point_id] = None
+        return True
+
+    def update(self, ids) -> np.ndarray:
+        """Add `ids` in order and return the ones that were new."""
+        return np.array([i for i in ids if self.add(i)], dtype=int)
+
+    def clear(self):
+        self.ids.clear()
+
+    def array(self) -> np.ndarray:
+        return np.fromiter(self.ids, dtype=int, count=len(self.ids))
+
+
+class SurfaceGraph:
+    """
+    Edges of a triangulated surface as a sparse CSR matrix weighted by edge length,
+    built once per loaded mesh for shortest-path queries along the surface.
+    """
+
+    def __init__(self, points: np.ndarray, triangles: np.ndarray):
+        self.points = np.asarray(points, dtype=float)
+        n = self.points.shape[0]
+
+        edges = np.concatenate((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]))
+        edges = np.sort(edges, axis=1).astype(np.int64)
+        keys = np.unique(edges[:, 0] * n + edges[:, 1])
+        start, end = keys // n, keys % n
+
+        lengths = np.linalg.norm(self.points[start] - self.points[end], axis=1)
+        # coincident nodes still have to count as connected
+        lengths = np.maximum(lengths, np.finfo(float).tiny)
+        self.graph = coo_matrix((lengths, (start, end)), shape=(n, n)).tocsr()
+        self.total_length = lengths.sum()
+        # separate bodies of an assembly cannot be joined by a path
+        _, self.components = connected_components(self.graph, directed=False)
+
+    def shortest_path(self, start: int, end: int) -> np.ndarray:
+        """
+        Node IDs of the shortest edge path from `start` to `end`, both included.
+        The search is limited to a few times the straight distance and widened only if
+        `end` is not reached, so queries stay local on large meshes. Raises ValueError if the
+        nodes are on separate bodies.
+        """
+        if start == end:
+            return np.array([start])
+        if self.components[start] != self.components[end]:
+            raise ValueError(f"Node {end} cannot be reached from node {start} along the surface")
+
+        limit = 2.0 * np.linalg.norm(self.points[end] - self.points[start])
+        while True:
+            distances, predecessors = dijkstra(self.graph, directed=False, indices=start,
+                                               return_predecessors=True, limit=limit)
+            if np.isfinite(distances[end]):
+                break
+            # no path is longer than all edges together
+            limit = 2.0 * limit if 0 < limit < self.total_length else np.inf
+
+        path = [end]
+        while path[-1] != start:
+            path.append(predecessors[path[-1]])
+        return np.array(path[::-1])
+
+    def seam(self, ids) -> np.ndarray:
+        """Shortest path along the surface through `ids` (start, waypoints, end) in order."""
+        ids = list(ids)
+        parts = [ids[:1]]
+        for start, end in zip(ids[:-1], ids[1:]):
+            parts.append(self.shortest_path(start, end)[1:])
+        return np.concatenate(parts).astype(int)
@@ -1,6 +1,10 @@
 import numpy as np
 from scipy.interpolate import CubicSpline
 
+# Gauss-Legendre rule used for every speed integral; exact for polynomials up to degree 15,
+# so it converges very quickly on the smooth speed of a cubic segment.
+GAUSS_NODES, GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(8)
+
 
 def fit_parametric_spline(pts):
     """
@@ -14,32 +18,122 @@ def fit_parametric_spline(pts):
     return cs_x, cs_y, cs_z
 
 
-def compute_arc_length(cs_x, cs_y, cs_z, num_samples=1000):
+def spline_speed(cs_x, cs_y, cs_z, t):
+    """
+    Evaluate |d(x, y, z)/dt| of the parametric spline at the parameters `t`.
+    """
+    return np.sqrt(cs_x(t, 1) ** 2 + cs_y(t, 1) ** 2 + cs_z(t, 1) ** 2)
+
+
+def gauss_length(cs_x, cs_y, cs_z, t_start, t_end):
+    """
+    Integrate the spline speed from `t_start` to `t_end` (element-wise arrays)
+    with a fixed Gauss-Legendre rule.
+    """
+    t_start = np.asarray(t_start, dtype=float)
+    t_end = np.asarray(t_end, dtype=float)
+    half = 0.5 * (t_end - t_start)
+    mid = 0.5 * (t_end + t_start)
+    t = mid[..., None] + half[..., None] * GAUSS_NODES
+    return half * (spline_speed(cs_x, cs_y, cs_z, t) @ GAUSS_WEIGHTS)
+
+
+def interval_arc_lengths(cs_x, cs_y, cs_z, starts, ends, scale, tol=1e-10, max_depth=30):
+    """
+    Integrate the spline speed over the parameter intervals [starts, ends] with adaptive
+    Gauss-Legendre quadrature. Intervals are bisected until the two halves agree with the
+    whole interval to within `tol` times `scale` (the total length) per unit parameter.
+    Returns the sorted start parameters and lengths of the resulting sub-intervals.
+    """
+    whole = gauss_length(cs_x, cs_y, cs_z, starts, ends)
+    scale = max(scale, np.finfo(float).tiny)
+
+    done_starts, done_lengths = [], []
+    for _ in range(max_depth):
+        mids = 0.5 * (starts + ends)
+        left = gauss_length(cs_x, cs_y, cs_z, starts, mids)
+        right = gauss_length(cs_x, cs_y, cs_z, mids, ends)
+        converged = np.abs(left + right - whole) <= tol * scale * (ends - starts)
+
+        done_starts.append(starts[converged])
+        done_lengths.append((left + right)[converged])
+
+        split = ~converged
+        if not split.any():
+            break
+        starts = np.concatenate((starts[split], mids[split]))
+        ends = np.concatenate((mids[split], ends[split]))
+        whole = np.concatenate((left[split], right[split]))
+    else:
+        done_starts.append(starts)
+        done_lengths.append(whole)
+
+    starts = np.concatenate(done_starts)
+    lengths = np.concatenate(done_lengths)
+    order = np.argsort(starts)
+    return starts[order], lengths[order]
+
+
+def compute_arc_length(cs_x, cs_y, cs_z, tol=1e-10, max_depth=30):
     """
-    Approximate the total arc length of the parametric spline by dense sampling.
-    Returns sampled parameters `t_dense` and cumulative lengths `cumlen`.
+    Integrate the arc length of each spline segment with adaptive Gauss-Legendre quadrature,
+    so the cost depends on the number of control points and the accuracy, not on the
+    welding duration.
+    Returns the interval knots `t_knots` and the cumulative lengths `cumlen` at those knots.
     """
-    t_dense = np.linspace(0, 1, num_samples)
-    x = cs_x(t_dense)
-    y = cs_y(t_dense)
-    z = cs_z(t_dense)
-    pts_dense = np.vstack((x, y, z)).T
-    diffs = np.diff(pts_dense, axis=0)
-    seg_lens = np.linalg.norm(diffs, axis=1)
-    cumlen = np.concatenate(([0], np.cumsum(seg_lens)))
-    return t_dense, cumlen
+    starts = cs_x.x[:-1]
+    ends = cs_x.x[1:]
+    scale = gauss_length(cs_x, cs_y, cs_z, starts, ends).sum()
+    interval_starts, lengths = interval_arc_lengths(cs_x, cs_y, cs_z, starts, ends, scale, tol, max_depth)
+    t_knots = np.append(interval_starts, cs_x.x[-1])
+    cumlen = np.concatenate(([0], np.cumsum(lengths)))
+    return t_knots, cumlen
 
 
-def sample_by_arc_length(cs_x, cs_y, cs_z, t_dense, cumlen, end_time):
+def invert_arc_length(cs_x, cs_y, cs_z, t_knots, cumlen, s_targets, tol=1e-10, max_iter=50):
     """
-    Sample positions and unit direction vectors at integer times.
+    Find the spline parameters whose arc length equals `s_targets`.
+    Each target is bracketed by the knot table and refined with a vectorized,
+    bracket-safeguarded Newton iteration.
+    """
+    s_targets = np.clip(np.asarray(s_targets, dtype=float), 0, cumlen[-1])
+    k = np.clip(np.searchsorted(cumlen, s_targets, side="right") - 1, 0, len(cumlen) - 2)
+    lo = t_knots[k]
+    hi = t_knots[k + 1]
+    s_lo = cumlen[k]
+    s_hi = cumlen[k + 1]
+
+    span = np.where(s_hi > s_lo, s_hi - s_lo, 1.0)
+    t = lo + (hi - lo) * (s_targets - s_lo) / span
+    abs_tol = tol * max(cumlen[-1], np.finfo(float).tiny)
+
+    for _ in range(max_iter):
+        residual = s_lo + gauss_length(cs_x, cs_y, cs_z, t_knots[k], t) - s_targets
+        active = np.abs(residual) > abs_tol
+        if not active.any():
+            break
+        lo = np.where(residual < 0, t, lo)
+        hi = np.where(residual > 0, t, hi)
+        speed = spline_speed(cs_x, cs_y, cs_z, t)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_newton = t - residual / speed
+        bisect = ~((t_newton >= lo) & (t_newton <= hi))
+        t = np.where(active, np.where(bisect, 0.5 * (lo + hi), t_newton), t)
+
+    return t
+
+
+def sample_by_arc_length(cs_x, cs_y, cs_z, t_knots, cumlen, end_time, times=None):
+    """
+    Sample positions and unit direction vectors at integer times, or at the given `times`.
     """
     total_length = cumlen[-1]
     speed = total_length / end_time
-    times = np.round(np.linspace(0, end_time, end_time))
-    s_targets = speed * times
+    if times is None:
+        times = np.round(np.linspace(0, end_time, end_time))
+    s_targets = speed * np.asarray(times, dtype=float)
 
-    u_samples = np.interp(s_targets, cumlen, t_dense)
+    u_samples = invert_arc_length(cs_x, cs_y, cs_z, t_knots, cumlen, s_targets)
 
     x_s = cs_x(u_samples)
     y_s = cs_y(u_samples)
@@ -57,15 +151,18 @@ def sample_by_arc_length(cs_x, cs_y, cs_z, t_dense, cumlen, end_time):
     return total_length, speed, positions, directions
 
 
-def calculate_position_and_directions(points: np.ndarray, end_time: int) -> tuple:
+def calculate_position_and_directions(points: np.ndarray, end_time: int, times: np.ndarray = None) -> tuple:
+    """
+    Fit the welding path and sample it at constant speed over `end_time` seconds,
+    once per second or at the given sample `times`.
+    Lengths and positions along the path are accurate to about 1e-10 of the total length.
+    """
     cx, cy, cz = fit_parametric_spline(points)
-    timing_density, cumulative_length = compute_arc_length(cx,
-                                                           cy,
-                                                           cz,
-                                                           num_samples=(end_time - 1) * 1000 + 1)
+    knots, cumulative_length = compute_arc_length(cx, cy, cz)
     return sample_by_arc_length(cx,
                                 cy,
                                 cz,
-                                timing_density,
+                                knots,
                                 cumulative_length,
-                                end_time)
+                                end_time,
+                                times)
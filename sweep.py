@@ -0,0 +1,121 @@
+import csv
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import command_writer as cw
+
+
+def parse_values(spec) -> np.ndarray:
+    """
+    Values of one swept parameter: a list of numbers, a "start:stop:num" grid string,
+    a comma separated string or a {"start", "stop", "num"} mapping.
+    """
+    if isinstance(spec, dict):
+        return np.linspace(float(spec["start"]), float(spec["stop"]), int(spec["num"]))
+    if isinstance(spec, str):
+        if ":" in spec:
+            parts = spec.split(":")
+            if len(parts) != 3:
+                raise ValueError(f"Invalid range '{spec}', expected start:stop:num")
+            start, stop, num = parts
+            return np.linspace(float(start), float(stop), int(num))
+        return np.array([float(s) for s in spec.split(",") if s.strip() != ''])
+    return np.atleast_1d(np.asarray(spec, dtype=float))
+
+
+def parameter_grid(base_parameters: np.ndarray, ranges: dict) -> list:
+    """
+    Every combination of the swept parameters, keyed by the names of
+    command_writer.GOLDAK_PARAMETER_NAMES; the others keep their base value.
+    """
+    names = list(ranges)
+    unknown = [name for name in names if name not in cw.GOLDAK_PARAMETER_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown Goldak parameters: {', '.join(unknown)}")
+
+    grid = []
+    for combination in itertools.product(*(parse_values(ranges[name]) for name in names)):
+        values = np.array(base_parameters, dtype=float)
+        for name, value in zip(names, combination):
+            values[cw.GOLDAK_PARAMETER_NAMES.index(name)] = value
+        grid.append(values)
+    return grid
+
+
+def run_sweep(output_dir: str,
+              points: np.ndarray,
+              base_parameters: np.ndarray,
+              ranges: dict,
+              welding_duration: int,
+              cooling_duration: int,
+              prefix: str = "sweep",
+              workers: int = None,
+              progress=None,
+              **options) -> str:
+    """
+    Write one APDL script per combination of the swept Goldak parameters into `output_dir`,
+    in parallel processes, plus a manifest.csv listing every file and its parameters.
+    With `workers=1` the scripts are written one after the other in the calling process.
+    The trajectory is computed once (once per front length `af` when `max_travel_fraction`
+    is used, since the step times depend on it) and shared by all scripts.
+    `options` are passed to write_apdl_commands; `progress(done, total)` works as there.
+    Returns the manifest path.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    grid = parameter_grid(base_parameters, ranges)
+
+    trajectories = {}
+    jobs = []
+    for index, values in enumerate(grid):
+        key = values[3] if options.get("max_travel_fraction") else None
+        if key not in trajectories:
+            trajectories[key] = cw.welding_steps(points, values, welding_duration,
+                                                 options.get("max_travel_fraction"))
+        jobs.append((os.path.join(output_dir, f"{prefix}_{index:04d}.txt"), values, trajectories[key]))
+
+    done = 0
+    if workers == 1:
+        for filepath, values, trajectory in jobs:
+            cw.write_apdl_commands(filepath,
+                                   points,
+                                   values,
+                                   welding_duration,
+                                   cooling_duration,
+                                   trajectory=trajectory,
+                                   **options)
+            done += 1
+            if progress is not None and progress(done, len(jobs)) is False:
+                raise cw.ExportCancelled()
+    else:
+        # spawned, not forked: the GUI calls this from a worker thread while Qt and VTK threads run
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(cw.write_apdl_commands,
+                                       filepath,
+                                       points,
+                                       values,
+                                       welding_duration,
+                                       cooling_duration,
+                                       trajectory=trajectory,
+                                       **options)
+                       for filepath, values, trajectory in jobs]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    done += 1
+                    if progress is not None and progress(done, len(jobs)) is False:
+                        raise cw.ExportCancelled()
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+
+    manifest_path = os.path.join(output_dir, "manifest.csv")
+    with cw.atomic_open(manifest_path) as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(("file",) + cw.GOLDAK_PARAMETER_NAMES)
+        for filepath, values, _ in jobs:
+            writer.writerow([os.path.basename(filepath)] + [repr(float(v)) for v in values])
+    return manifest_path
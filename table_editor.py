@@ -1,5 +1,6 @@
 import numpy as np
 from PySide6.QtWidgets import QTableWidget
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
 
 
 def table_to_numpy(table_widget: QTableWidget) -> np.ndarray:
@@ -20,3 +21,135 @@ def table_to_numpy(table_widget: QTableWidget) -> np.ndarray:
                 numpy_array[i, j] = 0.0
 
     return numpy_array.astype(float)
+
+
+def validate_points(points) -> np.ndarray:
+    """Check that `points` is an (n, 3) array of finite coordinates and return it as floats."""
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError(f"Expected an (n, 3) array of points, got shape {points.shape}")
+    invalid = ~np.isfinite(points).all(axis=1)
+    if invalid.any():
+        raise ValueError(f"Rows {np.flatnonzero(invalid).tolist()} contain invalid coordinates")
+    return points
+
+
+class PointsTableModel(QAbstractTableModel):
+    """Welding path points held in an (n, 3) NumPy array and shown as an X, Y, Z table."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.points = np.empty((0, 3))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.points.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return f"{self.points[index.row(), index.column()]:.3f}"
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return ("X", "Y", "Z")[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        try:
+            value = float(value)
+        except ValueError:
+            return False
+        if not np.isfinite(value):
+            return False
+        self.points[index.row(), index.column()] = value
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def set_points(self, points):
+        """Replace all points with one array assignment."""
+        points = validate_points(points)
+        self.beginResetModel()
+        self.points = points.copy()
+        self.endResetModel()
+
+    def append_points(self, points):
+        points = validate_points(np.atleast_2d(points))
+        if points.shape[0] == 0:
+            return
+        n = self.points.shape[0]
+        self.beginInsertRows(QModelIndex(), n, n + points.shape[0] - 1)
+        self.points = np.vstack((self.points, points))
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_points(np.empty((0, 3)))
+
+
+class MeshPointsModel(QAbstractTableModel):
+    """
+    Read-only ID, X, Y, Z view of the mesh points. Only the rows Qt asks for are formatted,
+    and a coordinate range filter is applied as a vectorized mask over the point array.
+    """
+
+    def __init__(self, points: np.ndarray, parent=None):
+        super().__init__(parent)
+        self.points = points
+        self.rows = np.arange(points.shape[0])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 4
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            point_id = self.rows[index.row()]
+            if index.column() == 0:
+                return str(point_id)
+            return f"{self.points[point_id, index.column() - 1]:.3f}"
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return ("ID", "X", "Y", "Z")[section]
+        return None
+
+    def set_filter(self, lower: np.ndarray = None, upper: np.ndarray = None):
+        """Show only points with lower <= X, Y, Z <= upper; NaN bounds are ignored."""
+        mask = np.ones(self.points.shape[0], dtype=bool)
+        for bound, compare in ((lower, np.greater_equal), (upper, np.less_equal)):
+            if bound is None:
+                continue
+            for axis, value in enumerate(bound):
+                if not np.isnan(value):
+                    mask &= compare(self.points[:, axis], float(value))
+
+        self.beginResetModel()
+        self.rows = np.flatnonzero(mask)
+        self.endResetModel()
+
+    def row_of_id(self, point_id: int) -> int:
+        """Row showing `point_id`, or -1 if it is filtered out."""
+        row = np.searchsorted(self.rows, point_id)
+        if row < len(self.rows) and self.rows[row] == point_id:
+            return int(row)
+        return -1
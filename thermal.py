@@ -0,0 +1,84 @@
+import numpy as np
+
+from goldak import source_frames
+
+MATERIAL_NAMES = ("density", "specific_heat", "conductivity")
+# Structural steel in the mm / t / s / mJ unit system of the generated scripts
+DEFAULT_MATERIAL = np.array([7.85e-9, 4.6e8, 45.0])
+
+# exp(-CUTOFF) is the smallest kernel value still summed
+CUTOFF = 14.0
+
+
+def source_samples(duration: float, length: float, goldak_parameters: np.ndarray, max_samples: int = 2000) -> np.ndarray:
+    """
+    Mid-times of equal sub-intervals of the weld, spaced so that the source moves at most
+    about half of its smallest radius between two of them.
+    """
+    spacing = 0.5 * min(goldak_parameters[1:5])
+    n = int(np.clip(np.ceil(length / spacing), max(duration, 1), max_samples))
+    return (np.arange(n) + 0.5) * duration / n
+
+
+def moving_source_temperature(nodes: np.ndarray,
+                              source_times: np.ndarray,
+                              positions: np.ndarray,
+                              directions: np.ndarray,
+                              goldak_parameters: np.ndarray,
+                              material: np.ndarray,
+                              time: float,
+                              chunk_size: int = 4_000_000,
+                              progress=None) -> np.ndarray:
+    """
+    Approximate temperature of the `nodes` at `time`, superposing the analytic solution of an
+    instantaneous Gaussian heat release in an infinite body for every source sample taken at
+    the `source_times` of source_samples.
+    Each sample releases qval * dt with the Goldak radii as Gaussian widths (variance a^2 / 6
+    along the travel direction with a the mean of the front and rear lengths, b^2 / 6 and
+    c^2 / 6 across it), which then spreads with diffusivity k / (rho * cp).
+    Nodes are processed in x-sorted chunks of at most `chunk_size` node-sample pairs, and
+    samples too far from a chunk to contribute are skipped.
+    `progress(done, total)` returning False stops the evaluation and returns None.
+    """
+    qval, c, b, af, ar = goldak_parameters[:5]
+    ambient = goldak_parameters[8]
+    density, specific_heat, conductivity = material
+    diffusivity = conductivity / (density * specific_heat)
+
+    nodes = np.asarray(nodes, dtype=float)
+    temperature = np.full(nodes.shape[0], float(ambient))
+
+    active = source_times < time
+    if not active.any():
+        return temperature
+    # source_times are the mid-times of equal intervals from 0, see source_samples
+    dt = 2 * source_times[0]
+    positions = positions[active]
+    u, v, w = source_frames(directions[active])
+
+    # Gaussian variances along u, v, w after spreading for the elapsed time
+    spread = 2 * diffusivity * (time - source_times[active])
+    variance = np.column_stack(((0.5 * (af + ar)) ** 2 / 6 + spread, b ** 2 / 6 + spread, c ** 2 / 6 + spread))
+    scale = qval * dt / (density * specific_heat * np.sqrt((2 * np.pi) ** 3 * variance.prod(axis=1)))
+    reach = np.sqrt(2 * CUTOFF * variance.max(axis=1))
+
+    order = np.argsort(nodes[:, 0])
+    step = max(chunk_size // len(positions), 1)
+    total = len(order)
+    for start in range(0, total, step):
+        ids = order[start:start + step]
+        chunk = nodes[ids]
+
+        # samples whose reach overlaps the chunk's bounding box
+        gap = np.maximum(np.maximum(chunk.min(axis=0) - positions, positions - chunk.max(axis=0)), 0)
+        near = np.einsum("ij,ij->i", gap, gap) < reach ** 2
+        if near.any():
+            d = chunk[:, None, :] - positions[near][None, :, :]
+            exponent = (np.einsum("mnk,nk->mn", d, u[near]) ** 2 / variance[near, 0]
+                        + np.einsum("mnk,nk->mn", d, v[near]) ** 2 / variance[near, 1]
+                        + np.einsum("mnk,nk->mn", d, w[near]) ** 2 / variance[near, 2])
+            temperature[ids] += np.exp(-0.5 * exponent) @ scale[near]
+
+        if progress is not None and progress(min(start + step, total), total) is False:
+            return None
+    return temperature
@@ -0,0 +1,149 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from spline import fit_parametric_spline, interval_arc_lengths, sample_by_arc_length
+
+
+def points_key(points: np.ndarray) -> str:
+    """Hash of the control points used as cache key."""
+    points = np.ascontiguousarray(points, dtype=float)
+    return hashlib.sha1(repr(points.shape).encode() + points.tobytes()).hexdigest()
+
+
+def segment_arc_lengths(splines: tuple, points: np.ndarray, starts, ends) -> tuple:
+    """Adaptive quadrature sub-intervals of the given spline segments."""
+    scale = np.linalg.norm(np.diff(points, axis=0), axis=1).sum()
+    return interval_arc_lengths(*splines, starts, ends, scale)
+
+
+def times_key(times) -> str:
+    if times is None:
+        return ""
+    return hashlib.sha1(np.ascontiguousarray(times, dtype=float).tobytes()).hexdigest()
+
+
+class Trajectory:
+    """
+    Fitted welding path: the x/y/z CubicSplines and the arc-length table of their
+    adaptive quadrature sub-intervals.
+    """
+
+    def __init__(self, points: np.ndarray, splines: tuple = None, interval_starts=None, interval_lengths=None):
+        self.points = np.array(points, dtype=float)
+        self.splines = splines if splines is not None else fit_parametric_spline(self.points)
+        if interval_starts is None:
+            breaks = self.splines[0].x
+            interval_starts, interval_lengths = segment_arc_lengths(self.splines, self.points, breaks[:-1], breaks[1:])
+        self.interval_starts = interval_starts
+        self.interval_lengths = interval_lengths
+        self.knots = np.append(interval_starts, self.splines[0].x[-1])
+        self.cumlen = np.concatenate(([0], np.cumsum(interval_lengths)))
+
+    @property
+    def length(self) -> float:
+        return self.cumlen[-1]
+
+    def sample(self, end_time: int, times: np.ndarray = None) -> tuple:
+        """Same result as spline.calculate_position_and_directions."""
+        return sample_by_arc_length(*self.splines, self.knots, self.cumlen, end_time, times)
+
+    def with_point(self, index: int, point: np.ndarray, tol: float = 1e-10) -> "Trajectory":
+        """
+        Trajectory with control point `index` moved to `point`.
+        The splines are refitted, but only the segments whose polynomial coefficients changed
+        by more than `tol` of the path length are integrated again; the influence of a moved
+        point on a cubic spline decays quickly along the path.
+        """
+        points = self.points.copy()
+        points[index] = point
+        splines = fit_parametric_spline(points)
+
+        change = np.max([np.abs(new.c - old.c).max(axis=0) for new, old in zip(splines, self.splines)], axis=0)
+        changed = change > tol * max(self.length, np.finfo(float).tiny)
+
+        breaks = splines[0].x
+        interval_segments = np.searchsorted(breaks, self.interval_starts, side="right") - 1
+        keep = ~changed[interval_segments]
+
+        new_starts, new_lengths = segment_arc_lengths(splines, points, breaks[:-1][changed], breaks[1:][changed])
+
+        starts = np.concatenate((self.interval_starts[keep], new_starts))
+        lengths = np.concatenate((self.interval_lengths[keep], new_lengths))
+        order = np.argsort(starts)
+        return Trajectory(points, splines, starts[order], lengths[order])
+
+
+class TrajectoryCache:
+    """
+    LRU cache of fitted trajectories, keyed by a hash of the control points, and of their
+    samplings, keyed by the points plus the sampling settings. Safe to share between the
+    GUI thread and export workers.
+    """
+
+    def __init__(self, maxsize: int = 16, max_samplings: int = 8):
+        self.maxsize = maxsize
+        self.max_samplings = max_samplings
+        self.trajectories = OrderedDict()
+        self.samplings = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, cache: OrderedDict, key):
+        with self.lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        return None
+
+    def store(self, cache: OrderedDict, key, value, maxsize: int):
+        with self.lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+
+    def get(self, points: np.ndarray, previous: np.ndarray = None) -> Trajectory:
+        """
+        Trajectory through `points`. If `previous` control points are cached and differ from
+        `points` in a single row, the fit is updated incrementally from them.
+        """
+        key = points_key(points)
+        trajectory = self.lookup(self.trajectories, key)
+        if trajectory is not None:
+            return trajectory
+
+        base = None
+        if previous is not None and np.shape(previous) == np.shape(points):
+            moved = np.flatnonzero(np.any(np.asarray(previous) != np.asarray(points), axis=1))
+            if len(moved) == 1:
+                base = self.lookup(self.trajectories, points_key(previous))
+
+        if base is not None:
+            trajectory = base.with_point(moved[0], np.asarray(points)[moved[0]])
+        else:
+            trajectory = Trajectory(points)
+        self.store(self.trajectories, key, trajectory, self.maxsize)
+        return trajectory
+
+    def sample(self, points: np.ndarray, end_time: int, times: np.ndarray = None) -> tuple:
+        """Cached equivalent of spline.calculate_position_and_directions, with read-only arrays."""
+        key = (points_key(points), end_time, times_key(times))
+        result = self.lookup(self.samplings, key)
+        if result is None:
+            result = self.get(points).sample(end_time, times)
+            # the arrays are shared by every caller and thread
+            for values in result[2:]:
+                values.setflags(write=False)
+            self.store(self.samplings, key, result, self.max_samplings)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.trajectories.clear()
+            self.samplings.clear()
+
+
+# Shared by the GUI and the exporter
+default_cache = TrajectoryCache()
@@ -0,0 +1,42 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+
+class WorkerSignals(QObject):
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class Worker(QRunnable):
+    """
+    Run `function(*args, **kwargs)` on a QThreadPool thread.
+    The function receives a `progress(done, total)` keyword argument that forwards to the
+    `progress` signal and returns False once `cancel` has been called.
+    """
+
+    def __init__(self, function, *args, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def report_progress(self, done, total):
+        self.signals.progress.emit(done, total)
+        return not self.is_cancelled
+
+    def run(self):
+        try:
+            result = self.function(*self.args, progress=self.report_progress, **self.kwargs)
+        except Exception as e:
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)